@@ -0,0 +1,58 @@
+import hashlib
+import hmac
+import secrets
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import CREDENTIAL_CACHE_LOOKUPS
+
+
+class CredentialCache:
+    """Remembers passwords that recently passed bcrypt verification.
+
+    Entries are keyed by the username and a keyed HMAC of the password, under
+    a key generated per process, so the password itself is never kept. Each
+    entry holds the hash it was verified against and stops matching as soon
+    as the stored hash changes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.hits = 0
+        self.misses = 0
+        self._entries = TTLCache(maxsize, ttl)
+        self._key = secrets.token_bytes(32)
+
+    def _get_key(self, username: str, password: str) -> tuple[str, bytes]:
+        message = f"{username}\0{password}".encode()
+        return username, hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def verify(self, username: str, password: str, hashed_password: str) -> bool:
+        key = self._get_key(username, password)
+        verified_hash = self._entries.get(key)
+
+        if verified_hash is not None and not hmac.compare_digest(
+            verified_hash, hashed_password
+        ):
+            self._entries.pop(key)
+            verified_hash = None
+
+        if verified_hash is None:
+            self.misses += 1
+            CREDENTIAL_CACHE_LOOKUPS.labels("miss").inc()
+            return False
+
+        self.hits += 1
+        CREDENTIAL_CACHE_LOOKUPS.labels("hit").inc()
+        return True
+
+    def add(self, username: str, password: str, hashed_password: str):
+        self._entries.set(self._get_key(username, password), hashed_password)
+
+    def clear(self):
+        self._entries.clear()
+
+
+credential_cache = CredentialCache(
+    maxsize=settings.CREDENTIAL_CACHE_SIZE,
+    ttl=settings.CREDENTIAL_CACHE_TTL.total_seconds(),
+)
@@ -1,16 +1,17 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.auth.security import create_jwt
 from app.api.v1.auth.services.user_service import UserService
 from app.core.db.dependencies import get_session
+from app.core.profiler import ProfiledRoute
 from .schemas import AuthRequest, AuthResponse
+from app.api.v1.responses import INVALID_CREDENTIALS
 from app.api.v1.schemas import ErrorResponse
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post(
@@ -28,18 +29,13 @@ async def auth(
     ],
 ) -> AuthResponse:
     user_service = UserService(session)
-    user = await user_service.get_or_create_user(
+    user = await user_service.login(
         username=auth_request.username, password=auth_request.password
     )
     await session.commit()
 
-    if not await user_service.authenticate_user(
-        username=auth_request.username, password=auth_request.password
-    ):
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content=ErrorResponse(errors="Invalid username or password").model_dump(),
-        )
+    if not user:
+        return INVALID_CREDENTIALS
 
     token = create_jwt({"sub": str(user.id)})
 
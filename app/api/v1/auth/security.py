@@ -1,16 +1,25 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
 from jwt import InvalidTokenError, decode, encode
 from datetime import datetime, timezone
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASHING
 from app.api.v1.auth.models import User
 from .schemas import AuthRequest
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+token_cache = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_TTL.total_seconds()
+)
+
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -20,6 +29,68 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+_hashing_executor: Executor | None = None
+_hashing_slots: asyncio.Semaphore | None = None
+
+
+def get_hashing_executor() -> Executor | None:
+    global _hashing_executor
+
+    if settings.HASHING_EXECUTOR == "inline":
+        return None
+
+    if _hashing_executor is None:
+        if settings.HASHING_EXECUTOR == "process":
+            _hashing_executor = ProcessPoolExecutor(
+                max_workers=settings.HASHING_WORKERS
+            )
+        else:
+            _hashing_executor = ThreadPoolExecutor(
+                max_workers=settings.HASHING_WORKERS, thread_name_prefix="hashing"
+            )
+
+    return _hashing_executor
+
+
+def shutdown_hashing_executor():
+    global _hashing_executor, _hashing_slots
+
+    if _hashing_executor is not None:
+        _hashing_executor.shutdown()
+
+    _hashing_executor = None
+    _hashing_slots = None
+
+
+async def run_in_hashing_executor(func, *args):
+    global _hashing_slots
+
+    executor = get_hashing_executor()
+    if executor is None:
+        return func(*args)
+
+    # Bounds the executor queue: once HASHING_QUEUE_SIZE operations are in
+    # flight, further callers wait here without blocking the event loop.
+    if _hashing_slots is None:
+        _hashing_slots = asyncio.Semaphore(settings.HASHING_QUEUE_SIZE)
+
+    async with _hashing_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+
+async def get_password_hash_async(password):
+    with PASSWORD_HASHING.labels("hash").time():
+        return await run_in_hashing_executor(get_password_hash, password)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    with PASSWORD_HASHING.labels("verify").time():
+        return await run_in_hashing_executor(
+            verify_password, plain_password, hashed_password
+        )
+
+
 def create_jwt(data: dict):
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
@@ -34,16 +105,32 @@ def create_jwt(data: dict):
     )
 
 
-def decode_jwt(token: str):
-    return decode(
+def decode_jwt(token: str, use_cache: bool = True):
+    use_cache = use_cache and settings.JWT_CACHE_ENABLED
+
+    if use_cache:
+        token_payload = token_cache.get(token)
+        if token_payload is not None:
+            # Every caller gets its own dict, so none of them can alter the
+            # claims that the cache hands out to the next request.
+            return dict(token_payload)
+
+    token_payload = decode(
         token,
         settings.SECRET_KEY,
         [settings.ALGORITHM],
     )
 
+    if use_cache:
+        exp = token_payload.get("exp")
+        ttl = exp - time.time() if exp is not None else None
+        token_cache.set(token, dict(token_payload), ttl)
+
+    return token_payload
+
 
-def get_sub_from_token(token: str):
-    token_payload = decode_jwt(token)
+def get_sub_from_token(token: str, use_cache: bool = True):
+    token_payload = decode_jwt(token, use_cache)
 
     token_sub = token_payload.get("sub")
     if not token_sub:
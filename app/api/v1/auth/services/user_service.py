@@ -4,8 +4,13 @@ from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime
 
 
+from app.api.v1.auth.credential_cache import credential_cache
 from app.api.v1.auth.models import User
-from app.api.v1.auth.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.api.v1.auth.security import (
+    get_password_hash_async,
+    verify_password_async,
+)
 
 
 class UserService:
@@ -43,7 +48,7 @@ class UserService:
         return user
 
     async def get_or_create_user(self, username: str, password: str) -> User:
-        hashed_password = get_password_hash(password)
+        hashed_password = await get_password_hash_async(password)
 
         result = await self.session.execute(
             insert(User)
@@ -67,6 +72,50 @@ class UserService:
 
         return user
 
+    async def login(self, username: str, password: str) -> User | None:
+        user = await self.get_user_by_username(username)
+
+        if not user:
+            hashed_password = await get_password_hash_async(password)
+
+            result = await self.session.execute(
+                insert(User)
+                .values(
+                    username=username,
+                    password=hashed_password,
+                    created_at=datetime.now(),
+                    coins=1000,
+                )
+                .on_conflict_do_nothing(index_elements=["username"])
+                .returning(User)
+            )
+            user = result.scalar()
+
+            if user:
+                return user
+
+            # A concurrent first login for the same username won the insert,
+            # so the password has to be checked against the stored hash.
+            user = await self.get_user_by_username(username)
+
+        if not await self.check_password(user, password):
+            return None
+
+        return user
+
+    async def check_password(self, user: User, password: str) -> bool:
+        if not settings.CREDENTIAL_CACHE_ENABLED:
+            return await verify_password_async(password, user.password)
+
+        if credential_cache.verify(user.username, password, user.password):
+            return True
+
+        if not await verify_password_async(password, user.password):
+            return False
+
+        credential_cache.add(user.username, password, user.password)
+        return True
+
     async def authenticate_user(self, username: str, password: str) -> bool:
         result = await self.session.execute(select(User).filter_by(username=username))
         user = result.scalar()
@@ -74,7 +123,7 @@ class UserService:
         if not user:
             return False
 
-        if not verify_password(password, user.password):
+        if not await self.check_password(user, password):
             return False
 
         return True
@@ -0,0 +1,19 @@
+import hmac
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Annotated
+
+from app.api.v1.auth.dependencies import auth_scheme
+from app.core.config import settings
+
+
+# Diagnostics are only served to requests bearing INTERNAL_API_TOKEN; without
+# a configured token nobody gets them.
+async def is_internal_client(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(auth_scheme)],
+) -> bool:
+    token = settings.INTERNAL_API_TOKEN
+    if not token or not credentials:
+        return False
+
+    return hmac.compare_digest(credentials.credentials.encode(), token.encode())
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+
+from app.api.v1.responses import INVALID_TOKEN
+from app.core.db.pool import pool_stats
+from app.core.db.slow_queries import slow_query_recorder
+from .dependencies import is_internal_client
+from .schemas import PoolStatsResponse, SlowQueriesResponse
+
+
+router = APIRouter(prefix="/internal", include_in_schema=False)
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats(
+    authorized: Annotated[bool, Depends(is_internal_client)],
+):
+    if not authorized:
+        return INVALID_TOKEN
+
+    return pool_stats.snapshot()
+
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+async def get_slow_queries(
+    authorized: Annotated[bool, Depends(is_internal_client)],
+):
+    if not authorized:
+        return INVALID_TOKEN
+
+    return slow_query_recorder.snapshot()
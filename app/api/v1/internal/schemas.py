@@ -0,0 +1,34 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class PoolStatsResponse(BaseModel):
+    size: int | None
+    checkedOut: int | None
+    idle: int | None
+    overflow: int | None
+    connects: int
+    closes: int
+    invalidations: int
+    checkouts: int
+    checkins: int
+    timeouts: int
+    waitCount: int
+    waitTotalSeconds: float
+    waitMaxSeconds: float
+    waitAvgSeconds: float
+
+
+class SlowQueryPlan(BaseModel):
+    fingerprint: str
+    statement: str
+    durationMs: float
+    capturedAt: datetime
+    analyzed: bool
+    seqScans: list[str]
+    plan: str
+
+
+class SlowQueriesResponse(BaseModel):
+    slowStatements: int
+    plans: list[SlowQueryPlan]
@@ -0,0 +1,25 @@
+from fastapi import Response, status
+
+from app.api.v1.schemas import ErrorResponse
+
+
+def error_response(status_code: int, message: str) -> Response:
+    return Response(
+        content=ErrorResponse(errors=message).model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+# The fixed error responses are rendered once at import and returned as is by
+# every request, so they must never be modified (headers included).
+INVALID_TOKEN = error_response(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+INVALID_CREDENTIALS = error_response(
+    status.HTTP_401_UNAUTHORIZED, "Invalid username or password"
+)
+ITEM_DOES_NOT_EXIST = error_response(status.HTTP_400_BAD_REQUEST, "Item does not exist")
+INSUFFICIENT_FUNDS = error_response(
+    status.HTTP_400_BAD_REQUEST, "You don't have enough coins"
+)
+RECIPIENT_NOT_FOUND = error_response(status.HTTP_400_BAD_REQUEST, "recipient not found")
+INVALID_CURSOR = error_response(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import asyncpg
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.store.models import Item
+from app.core.config import settings
+from app.core.db.engine import async_session
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    id: int
+    type: str
+    cost: int
+
+
+class CatalogSnapshot:
+    def __init__(self, items: list[CatalogItem]):
+        items = sorted(items, key=lambda item: item.id)
+
+        self.items = MappingProxyType({item.type: item for item in items})
+        # Pre-rendered body of GET /api/items
+        self.body = json.dumps(
+            [{"type": item.type, "cost": item.cost} for item in items],
+            separators=(",", ":"),
+        ).encode()
+        # Content hash: equal across processes that loaded the same rows
+        self.version = hashlib.sha256(
+            json.dumps([[item.id, item.type, item.cost] for item in items]).encode()
+        ).hexdigest()[:16]
+
+    def get(self, type: str) -> CatalogItem | None:
+        return self.items.get(type)
+
+
+class Catalog:
+    """Process-local, immutable view of the items table.
+
+    Reloaded every CATALOG_REFRESH_INTERVAL and whenever a new catalog
+    version is announced on the CATALOG_CHANNEL notification channel.
+    """
+
+    def __init__(self):
+        self.snapshot: CatalogSnapshot | None = None
+        self._refresh_task: asyncio.Task | None = None
+        # Refreshes triggered by notifications, referenced until they finish
+        self._notification_tasks: set[asyncio.Task] = set()
+        self._listener: asyncpg.Connection | None = None
+
+    async def load(self, session: AsyncSession) -> CatalogSnapshot:
+        result = await session.execute(select(Item.id, Item.type, Item.cost))
+        self.snapshot = CatalogSnapshot([CatalogItem(*row) for row in result])
+        return self.snapshot
+
+    async def get_snapshot(self, session: AsyncSession) -> CatalogSnapshot:
+        if self.snapshot is None:
+            return await self.load(session)
+
+        return self.snapshot
+
+    async def refresh(self):
+        async with async_session() as session:
+            await self.load(session)
+
+    def clear(self):
+        self.snapshot = None
+
+    async def start(self):
+        await self.refresh()
+        await self._listen()
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+        for task in self._notification_tasks:
+            task.cancel()
+        self._notification_tasks.clear()
+
+        if self._listener and not self._listener.is_closed():
+            await self._listener.close()
+        self._listener = None
+
+    async def _listen(self):
+        if self._listener and not self._listener.is_closed():
+            return
+
+        try:
+            self._listener = await asyncpg.connect(
+                user=settings.DB_USER,
+                password=settings.DB_PASSWORD,
+                host=settings.DB_HOST,
+                database=settings.DB_NAME,
+            )
+            await self._listener.add_listener(
+                settings.CATALOG_CHANNEL, self._on_notification
+            )
+        except (OSError, asyncpg.PostgresError):
+            logger.exception("Could not listen for catalog changes")
+            self._listener = None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        if self.snapshot and payload == self.snapshot.version:
+            return
+
+        task = asyncio.create_task(self._safe_refresh())
+        self._notification_tasks.add(task)
+        task.add_done_callback(self._notification_tasks.discard)
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Catalog refresh failed")
+
+    async def _refresh_periodically(self):
+        interval = settings.CATALOG_REFRESH_INTERVAL.total_seconds()
+        while True:
+            await asyncio.sleep(interval)
+            await self._safe_refresh()
+            # Re-establish the listener if the connection was lost
+            await self._listen()
+
+
+async def notify_catalog_changed(session: AsyncSession):
+    snapshot = await catalog.load(session)
+    await session.execute(
+        text("SELECT pg_notify(:channel, :version)"),
+        {"channel": settings.CATALOG_CHANNEL, "version": snapshot.version},
+    )
+
+
+catalog = Catalog()
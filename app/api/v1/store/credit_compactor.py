@@ -0,0 +1,53 @@
+import asyncio
+import logging
+
+from app.api.v1.store.services.credit_service import CreditService
+from app.core.config import settings
+from app.core.db.engine import async_session
+
+
+logger = logging.getLogger(__name__)
+
+
+class CreditCompactor:
+    """Folds pending credits into balances every CREDIT_COMPACTION_INTERVAL.
+
+    Users who only receive gifts never fold their credits themselves, the
+    compactor keeps the pending_credits table short for them.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def compact(self) -> int:
+        """Folds pending credits in batches until none are left."""
+        total = 0
+        while True:
+            async with async_session() as session:
+                folded = await CreditService(session).compact(
+                    settings.CREDIT_COMPACTION_BATCH_SIZE
+                )
+                await session.commit()
+            total += folded
+            if folded < settings.CREDIT_COMPACTION_BATCH_SIZE:
+                return total
+
+    def start(self):
+        self._task = asyncio.create_task(self._compact_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _compact_periodically(self):
+        interval = settings.CREDIT_COMPACTION_INTERVAL.total_seconds()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("Credit compaction failed")
+
+
+credit_compactor = CreditCompactor()
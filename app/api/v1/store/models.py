@@ -1,5 +1,12 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import CheckConstraint, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    ForeignKey,
+    Enum,
+    Index,
+    UniqueConstraint,
+)
 import enum
 from datetime import datetime
 
@@ -15,22 +22,49 @@ class Item(Base):
     __table_args__ = (CheckConstraint("cost >= 0", name="check_cost_non_negative"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    type: Mapped[str]
+    type: Mapped[str] = mapped_column(unique=True)
     cost: Mapped[int]
 
 
 class Transaction(Base):
-    __table_args__ = (CheckConstraint("amount > 0", name="check_amount_positive"),)
+    __table_args__ = (
+        CheckConstraint("amount > 0", name="check_amount_positive"),
+        CheckConstraint("quantity > 0", name="check_transaction_quantity_positive"),
+        # Keyset pagination of sent and received history, newest first. The
+        # included columns let both history queries use index-only scans.
+        Index(
+            "ix_transactions_user_id_type_timestamp_id",
+            "user_id",
+            "type",
+            "timestamp",
+            "id",
+            postgresql_include=["recipient_id", "amount"],
+        ),
+        Index(
+            "ix_transactions_recipient_id_timestamp_id",
+            "recipient_id",
+            "timestamp",
+            "id",
+            postgresql_include=["user_id", "amount"],
+        ),
+        # Monthly partitions, see app/api/v1/store/services/partition_service.py.
+        # The partition key has to be part of the primary key. There is no
+        # default partition: it would keep PostgreSQL from scanning partitions
+        # in order for newest-first history pages.
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     amount: Mapped[int] = mapped_column()
     type: Mapped[TransactionType] = mapped_column(Enum(TransactionType))
-    timestamp: Mapped[datetime] = mapped_column(default=datetime.now())
+    timestamp: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.now)
     recipient_id: Mapped[int | None] = mapped_column(
         ForeignKey("users.id"), nullable=True
     )
     item_id: Mapped[int | None] = mapped_column(ForeignKey("items.id"), nullable=True)
+    # Items bought by a purchase, whose amount is the total cost. Gifts keep 1.
+    quantity: Mapped[int] = mapped_column(default=1, server_default="1")
 
 
 class Inventory(Base):
@@ -61,3 +95,18 @@ class InventoryItem(Base):
     quantity: Mapped[int] = mapped_column(default=1)
 
     inventory: Mapped["Inventory"] = relationship("Inventory", back_populates="items")
+
+
+# Gifts credited in the deferred mode: appended here instead of locking the
+# recipient's row and folded into User.coins later.
+class PendingCredit(Base):
+    __tablename__ = "pending_credits"
+    __table_args__ = (
+        CheckConstraint("amount > 0", name="check_credit_amount_positive"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    amount: Mapped[int]
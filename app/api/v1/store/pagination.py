@@ -0,0 +1,26 @@
+import base64
+from datetime import datetime
+
+
+# Keyset cursors point at the last (timestamp, id) of a page. They are opaque
+# to clients but not signed: a forged cursor only changes where a user's own
+# history page starts.
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    raw = f"{timestamp.isoformat()},{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, id = raw.split(",")
+        return datetime.fromisoformat(timestamp), int(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# Ledger timestamps are naive local time, aware bounds are converted to it.
+def to_ledger_time(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
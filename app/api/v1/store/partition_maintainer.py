@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from datetime import date
+
+from app.api.v1.store.services.partition_service import (
+    PartitionService,
+    add_months,
+    partition_name,
+)
+from app.core.config import settings
+from app.core.db.engine import async_session
+from app.core.db.locks import LEDGER_PARTITIONS_LOCK, advisory_xact_lock
+
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """Keeps LEDGER_PARTITIONS_AHEAD monthly ledger partitions ready."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def ensure_partitions(self) -> list[date]:
+        async with async_session() as session:
+            # Workers starting together would otherwise race to create the
+            # same partitions
+            await session.execute(advisory_xact_lock(LEDGER_PARTITIONS_LOCK))
+            today = date.today()
+            created = await PartitionService(session).ensure_partitions(
+                today, add_months(today, settings.LEDGER_PARTITIONS_AHEAD)
+            )
+            await session.commit()
+
+        for month in created:
+            logger.info("Created ledger partition %s", partition_name(month))
+        return created
+
+    async def start(self):
+        await self.ensure_partitions()
+        self._task = asyncio.create_task(self._ensure_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _ensure_periodically(self):
+        interval = settings.LEDGER_PARTITIONS_CHECK_INTERVAL.total_seconds()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.ensure_partitions()
+            except Exception:
+                logger.exception("Ledger partition maintenance failed")
+
+
+partition_maintainer = PartitionMaintainer()
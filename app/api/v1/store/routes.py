@@ -1,26 +1,40 @@
-from fastapi import APIRouter, Depends, status, Response
-from typing import Annotated
-from fastapi.responses import JSONResponse
+from datetime import datetime
+from fastapi import APIRouter, Body, Depends, Query, Request, status, Response
+from typing import Annotated, Literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.auth.services.user_service import UserService
+from app.api.v1.responses import (
+    INSUFFICIENT_FUNDS,
+    INVALID_CURSOR,
+    INVALID_TOKEN,
+    ITEM_DOES_NOT_EXIST,
+    RECIPIENT_NOT_FOUND,
+)
 from app.api.v1.schemas import ErrorResponse
-from app.api.v1.store.services.inventory_item_service import InventoryItemService
-from app.api.v1.store.services.inventory_service import InventoryService
-from app.api.v1.store.services.item_service import ItemService
+from app.api.v1.store.services.info_service import InfoService
 from app.api.v1.store.services.transaction_service import TransactionService
-from .models import TransactionType
-from app.api.v1.auth.models import User
-from app.api.v1.auth.dependencies import get_user_from_jwt_factory
-from app.core.db.dependencies import get_session
+from app.api.v1.store.services.purchase_service import PurchaseResult, PurchaseService
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from .catalog import catalog
+from .pagination import decode_cursor, encode_cursor, to_ledger_time
+from app.api.v1.auth.dependencies import get_user_id_from_jwt_factory
+from app.core.config import settings
+from app.core.db.batching import write_batcher
+from app.core.db.dependencies import get_read_only_session, get_session
+from app.core.db.engine import read_only_async_session
+from app.core.profiler import ProfiledRoute
 from .schemas import (
+    AggregatedInfoResponse,
+    BatchGift,
     InfoResponse,
-    CoinHistory,
+    Item,
+    ReceivedHistoryPage,
+    SentHistoryPage,
     SendCoinRequest,
 )
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get(
@@ -34,54 +48,75 @@ router = APIRouter()
 )
 async def buy_item(
     item: str,
-    user: Annotated[User, Depends(get_user_from_jwt_factory(for_update=True))],
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
     session: Annotated[AsyncSession, Depends(get_session)],
+    quantity: Annotated[int, Query(ge=1, le=settings.PURCHASE_MAX_QUANTITY)] = 1,
 ):
-    if not user:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content=ErrorResponse(errors="Invalid token").model_dump(),
-        )
-
-    item_service = ItemService(session)
-    inventory_service = InventoryService(session)
-    inventory_item_service = InventoryItemService(session)
-    transcaction_service = TransactionService(session)
+    if not user_id:
+        return INVALID_TOKEN
 
-    item_obj = await item_service.get_item_by_type(item)
+    snapshot = await catalog.get_snapshot(session)
+    item_obj = snapshot.get(item)
     if not item_obj:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ErrorResponse(errors="Item does not exist").model_dump(),
+        return ITEM_DOES_NOT_EXIST
+
+    fold_credits = settings.TRANSFER_CREDIT_MODE == "deferred"
+    if settings.WRITE_BATCHING_ENABLED:
+        result = await write_batcher.submit(
+            lambda batch_session: PurchaseService(batch_session).purchase(
+                user_id, item_obj.id, fold_credits, quantity
+            )
         )
-
-    # Check if user has enough coins
-    if user.coins < item_obj.cost:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ErrorResponse(errors="You don't have enough coins").model_dump(),
+    else:
+        purchase_service = PurchaseService(session)
+        result = await purchase_service.purchase(
+            user_id, item_obj.id, fold_credits, quantity
         )
 
-    inventory = await inventory_service.get_or_create_inventory_for_user(user.id)
+    if result == PurchaseResult.UNKNOWN_USER:
+        return INVALID_TOKEN
 
-    _ = await inventory_item_service.add_item_to_inventory(item_obj.id, inventory.id)
+    if result == PurchaseResult.UNKNOWN_ITEM:
+        return ITEM_DOES_NOT_EXIST
 
-    # Subtract the cost from user's coins
-    user.coins -= item_obj.cost
-
-    _ = await transcaction_service.create_transaction(
-        user_id=user.id,
-        amount=item_obj.cost,
-        type=TransactionType.PURCHASE,
-        recipient_id=None,
-        item_id=item_obj.id,
-    )
+    if result == PurchaseResult.INSUFFICIENT_FUNDS:
+        return INSUFFICIENT_FUNDS
 
     await session.commit()
 
     return Response(status_code=status.HTTP_200_OK)
 
 
+@router.get(
+    "/items",
+    response_class=Response,
+    responses={
+        200: {"model": list[Item]},
+        304: {},
+        500: {},
+    },
+)
+async def items(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    snapshot = await catalog.get_snapshot(session)
+
+    etag = f'"{snapshot.version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_MAX_AGE}",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=snapshot.body, media_type="application/json", headers=headers
+    )
+
+
 @router.post(
     "/sendCoin",
     response_class=Response,
@@ -92,45 +127,88 @@ async def buy_item(
     },
 )
 async def send_coin(
-    user: Annotated[User, Depends(get_user_from_jwt_factory(for_update=True))],
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
     session: Annotated[AsyncSession, Depends(get_session)],
     send_coin_request: SendCoinRequest,
 ):
-    if not user:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content=ErrorResponse(errors="Invalid token").model_dump(),
+    if not user_id:
+        return INVALID_TOKEN
+
+    deferred = settings.TRANSFER_CREDIT_MODE == "deferred"
+    if settings.WRITE_BATCHING_ENABLED:
+        result = await write_batcher.submit(
+            lambda batch_session: TransferService(batch_session).transfer(
+                sender_id=user_id,
+                recipient=send_coin_request.toUser,
+                amount=send_coin_request.amount,
+                deferred=deferred,
+            )
         )
-
-    # TODO: service
-    if user.coins < send_coin_request.amount:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ErrorResponse(errors="You don't have enough coins").model_dump(),
+    else:
+        transfer_service = TransferService(session)
+        result = await transfer_service.transfer(
+            sender_id=user_id,
+            recipient=send_coin_request.toUser,
+            amount=send_coin_request.amount,
+            deferred=deferred,
         )
 
-    user_service = UserService(session)
-    transaction_service = TransactionService(session)
+    if result == TransferResult.UNKNOWN_SENDER:
+        return INVALID_TOKEN
 
-    recipient = await user_service.get_user_by_username(
-        send_coin_request.toUser, for_update=True
-    )
-    if not recipient:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=ErrorResponse(errors="recipient not found").model_dump(),
+    if result == TransferResult.INSUFFICIENT_FUNDS:
+        return INSUFFICIENT_FUNDS
+
+    if result == TransferResult.RECIPIENT_NOT_FOUND:
+        return RECIPIENT_NOT_FOUND
+
+    await session.commit()
+
+    return Response(status_code=status.HTTP_200_OK)
+
+
+@router.post(
+    "/sendCoin/batch",
+    response_class=Response,
+    responses={
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        500: {},
+    },
+)
+async def send_coin_batch(
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    gifts: Annotated[
+        list[BatchGift],
+        Body(min_length=1, max_length=settings.SEND_COIN_BATCH_MAX_SIZE),
+    ],
+):
+    if not user_id:
+        return INVALID_TOKEN
+
+    deferred = settings.TRANSFER_CREDIT_MODE == "deferred"
+    batch = [(gift.toUser, gift.amount) for gift in gifts]
+    if settings.WRITE_BATCHING_ENABLED:
+        result = await write_batcher.submit(
+            lambda batch_session: TransferService(batch_session).transfer_batch(
+                sender_id=user_id, gifts=batch, deferred=deferred
+            )
+        )
+    else:
+        transfer_service = TransferService(session)
+        result = await transfer_service.transfer_batch(
+            sender_id=user_id, gifts=batch, deferred=deferred
         )
 
-    user.coins -= send_coin_request.amount
-    recipient.coins += send_coin_request.amount
+    if result == TransferResult.UNKNOWN_SENDER:
+        return INVALID_TOKEN
 
-    _ = await transaction_service.create_transaction(
-        user_id=user.id,
-        amount=send_coin_request.amount,
-        type=TransactionType.GIFT,
-        recipient_id=recipient.id,
-        item_id=None,
-    )
+    if result == TransferResult.INSUFFICIENT_FUNDS:
+        return INSUFFICIENT_FUNDS
+
+    if result == TransferResult.RECIPIENT_NOT_FOUND:
+        return RECIPIENT_NOT_FOUND
 
     await session.commit()
 
@@ -139,34 +217,111 @@ async def send_coin(
 
 @router.get(
     "/info",
+    response_class=Response,
     responses={
+        200: {"model": InfoResponse | AggregatedInfoResponse},
         401: {"model": ErrorResponse},
         500: {},
     },
 )
 async def info(
-    user: Annotated[User, Depends(get_user_from_jwt_factory())],
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> InfoResponse:
-    if not user:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content=ErrorResponse(errors="Invalid token").model_dump(),
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
+    session: Annotated[AsyncSession, Depends(get_read_only_session)],
+    inventory: Literal["expanded", "aggregated"] = "expanded",
+):
+    if not user_id:
+        return INVALID_TOKEN
+
+    info_service = InfoService(session)
+    aggregated = inventory == "aggregated"
+
+    if settings.INFO_QUERY_MODE == "concurrent":
+        info = await info_service.get_info_concurrently(
+            read_only_async_session, user_id, aggregated
         )
+        body = info.model_dump_json() if info else None
+    else:
+        body = await info_service.get_info_json(user_id, aggregated)
+
+    if not body:
+        return INVALID_TOKEN
+
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/history/sent",
+    responses={
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        500: {},
+    },
+)
+async def sent_history(
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
+    session: Annotated[AsyncSession, Depends(get_read_only_session)],
+    limit: Annotated[int, Query(ge=1, le=settings.HISTORY_PAGE_MAX_LIMIT)] = 50,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> SentHistoryPage:
+    if not user_id:
+        return INVALID_TOKEN
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return INVALID_CURSOR
 
-    inventory_service = InventoryService(session)
-    transactions_service = TransactionService(session)
+    transaction_service = TransactionService(session)
+    page = await transaction_service.get_sent_transactions_page(
+        user_id, limit, after, to_ledger_time(since), to_ledger_time(until)
+    )
+    if page is None:
+        return INVALID_TOKEN
 
-    inventory = await inventory_service.get_or_create_inventory_for_user(user.id)
+    transactions, next_cursor = page
+
+    return SentHistoryPage(
+        transactions=transactions,
+        nextCursor=encode_cursor(*next_cursor) if next_cursor else None,
+    )
 
-    items = await inventory_service.get_inventory_items(inventory.id)
 
-    sent_transactions = await transactions_service.get_sent_transactions(user.id)
+@router.get(
+    "/history/received",
+    responses={
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        500: {},
+    },
+)
+async def received_history(
+    user_id: Annotated[int | None, Depends(get_user_id_from_jwt_factory())],
+    session: Annotated[AsyncSession, Depends(get_read_only_session)],
+    limit: Annotated[int, Query(ge=1, le=settings.HISTORY_PAGE_MAX_LIMIT)] = 50,
+    cursor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> ReceivedHistoryPage:
+    if not user_id:
+        return INVALID_TOKEN
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return INVALID_CURSOR
 
-    received_transactions = await transactions_service.get_received_transactions(
-        user.id
+    transaction_service = TransactionService(session)
+    page = await transaction_service.get_received_transactions_page(
+        user_id, limit, after, to_ledger_time(since), to_ledger_time(until)
     )
+    if page is None:
+        return INVALID_TOKEN
 
-    coin_history = CoinHistory(received=received_transactions, sent=sent_transactions)
+    transactions, next_cursor = page
 
-    return InfoResponse(coins=user.coins, inventory=items, coinHistory=coin_history)
+    return ReceivedHistoryPage(
+        transactions=transactions,
+        nextCursor=encode_cursor(*next_cursor) if next_cursor else None,
+    )
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 
 
 class Item(BaseModel):
@@ -29,5 +30,38 @@ class InfoResponse(BaseModel):
     coinHistory: CoinHistory
 
 
+class InventoryEntry(BaseModel):
+    type: str
+    quantity: int
+
+
+class AggregatedInfoResponse(BaseModel):
+    coins: int
+    inventory: list[InventoryEntry]
+    coinHistory: CoinHistory
+
+
+class SentTransaction(TransactionToUser):
+    timestamp: datetime
+
+
+class ReceivedTransaction(TransactionFromUser):
+    timestamp: datetime
+
+
+class SentHistoryPage(BaseModel):
+    transactions: list[SentTransaction]
+    nextCursor: str | None
+
+
+class ReceivedHistoryPage(BaseModel):
+    transactions: list[ReceivedTransaction]
+    nextCursor: str | None
+
+
 class SendCoinRequest(TransactionToUser):
     pass
+
+
+class BatchGift(TransactionToUser):
+    amount: int = Field(gt=0)
@@ -0,0 +1,95 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.locks import CREDIT_COMPACTION_LOCK
+
+
+# Moves the user's pending credits into the balance. Without pending credits
+# nothing is updated, so the user row is not locked.
+FOLD_CREDITS_STATEMENT = text(
+    """
+    WITH credits AS (
+        DELETE FROM pending_credits WHERE user_id = :user_id RETURNING amount
+    )
+    UPDATE users SET coins = users.coins + (SELECT sum(amount) FROM credits)
+    WHERE users.id = :user_id AND EXISTS (SELECT 1 FROM credits)
+    """
+)
+
+PENDING_CREDITS_STATEMENT = text(
+    """
+    SELECT COALESCE(sum(amount), 0) FROM pending_credits WHERE user_id = :user_id
+    """
+)
+
+# The balance including pending credits. Read in one statement, so that a
+# concurrent fold, which moves credits into users.coins, is seen either
+# entirely or not at all.
+BALANCE_STATEMENT = text(
+    """
+    SELECT users.coins + COALESCE((
+        SELECT sum(amount) FROM pending_credits WHERE user_id = users.id
+    ), 0)
+    FROM users
+    WHERE users.id = :user_id
+    """
+)
+
+# Folds up to :limit of the oldest pending credits of any users. Credits locked
+# by a concurrent fold are skipped and the advisory lock lets one compactor run
+# at a time. The users are locked in id order before their balances change,
+# like transfers lock them, so compaction can not deadlock with transfers.
+# FOR NO KEY UPDATE is the lock the UPDATE itself takes: unlike FOR UPDATE it
+# does not block the KEY SHARE locks of deferred gifts referencing the user.
+COMPACT_CREDITS_STATEMENT = text(
+    """
+    WITH batch AS (
+        SELECT id FROM pending_credits
+        WHERE (SELECT pg_try_advisory_xact_lock(:lock))
+        ORDER BY id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ), credits AS (
+        DELETE FROM pending_credits WHERE id IN (SELECT id FROM batch)
+        RETURNING user_id, amount
+    ), totals AS (
+        SELECT user_id, sum(amount) AS amount FROM credits GROUP BY user_id
+    ), locked AS (
+        SELECT id FROM users
+        WHERE id IN (SELECT user_id FROM totals)
+        ORDER BY id
+        FOR NO KEY UPDATE
+    ), folded AS (
+        UPDATE users SET coins = users.coins + totals.amount
+        FROM totals JOIN locked ON locked.id = totals.user_id
+        WHERE users.id = totals.user_id
+        RETURNING users.id
+    )
+    SELECT count(*) FROM credits
+    """
+)
+
+
+class CreditService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def fold(self, user_id: int):
+        await self.session.execute(FOLD_CREDITS_STATEMENT, dict(user_id=user_id))
+
+    async def get_pending_total(self, user_id: int) -> int:
+        result = await self.session.execute(
+            PENDING_CREDITS_STATEMENT, dict(user_id=user_id)
+        )
+        return result.scalar()
+
+    async def get_balance(self, user_id: int) -> int | None:
+        result = await self.session.execute(BALANCE_STATEMENT, dict(user_id=user_id))
+        return result.scalar()
+
+    async def compact(self, limit: int) -> int:
+        result = await self.session.execute(
+            COMPACT_CREDITS_STATEMENT,
+            dict(limit=limit, lock=CREDIT_COMPACTION_LOCK),
+        )
+        return result.scalar()
@@ -0,0 +1,211 @@
+import asyncio
+from sqlalchemy import JSON, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.store.schemas import AggregatedInfoResponse, CoinHistory, InfoResponse
+from app.api.v1.store.services.credit_service import CreditService
+from app.api.v1.store.services.inventory_service import InventoryService
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.config import settings
+
+
+# One entry per unit owned, the original /api/info inventory shape.
+EXPANDED_INVENTORY = """
+    SELECT json_agg(
+        json_build_object('type', items.type, 'cost', items.cost)
+        ORDER BY inventory_items.id
+    )
+    FROM inventories
+    JOIN inventory_items ON inventory_items.inventory_id = inventories.id
+    JOIN items ON items.id = inventory_items.item_id
+    CROSS JOIN generate_series(1, inventory_items.quantity)
+    WHERE inventories.user_id = users.id
+"""
+
+# One entry per item type with the quantity owned.
+AGGREGATED_INVENTORY = """
+    SELECT json_agg(
+        json_build_object('type', owned.type, 'quantity', owned.quantity)
+        ORDER BY owned.type
+    )
+    FROM (
+        SELECT items.type, sum(inventory_items.quantity) AS quantity
+        FROM inventories
+        JOIN inventory_items ON inventory_items.inventory_id = inventories.id
+        JOIN items ON items.id = inventory_items.item_id
+        WHERE inventories.user_id = users.id
+        GROUP BY items.type
+    ) AS owned
+"""
+
+# Everything /api/info returns, aggregated to JSON by PostgreSQL in one
+# round trip. Coin history is limited to the most recent transactions, the
+# balance includes credits not folded into users.coins yet.
+INFO_STATEMENT = """
+    SELECT
+        users.coins + COALESCE((
+            SELECT sum(amount) FROM pending_credits WHERE user_id = users.id
+        ), 0) AS coins,
+        COALESCE(({inventory}), '[]') AS inventory,
+        COALESCE((
+            SELECT json_agg(
+                json_build_object('fromUser', h.username, 'amount', h.amount)
+                ORDER BY h.timestamp DESC, h.id DESC
+            )
+            FROM (
+                SELECT sender.username, t.amount, t.timestamp, t.id
+                FROM transactions AS t
+                JOIN users AS sender ON sender.id = t.user_id
+                WHERE t.recipient_id = users.id
+                ORDER BY t.timestamp DESC, t.id DESC
+                LIMIT :history_limit
+            ) AS h
+        ), '[]') AS received,
+        COALESCE((
+            SELECT json_agg(
+                json_build_object('toUser', h.username, 'amount', h.amount)
+                ORDER BY h.timestamp DESC, h.id DESC
+            )
+            FROM (
+                SELECT recipient.username, t.amount, t.timestamp, t.id
+                FROM transactions AS t
+                JOIN users AS recipient ON recipient.id = t.recipient_id
+                WHERE t.user_id = users.id AND t.type = 'GIFT'
+                ORDER BY t.timestamp DESC, t.id DESC
+                LIMIT :history_limit
+            ) AS h
+        ), '[]') AS sent
+    FROM users
+    WHERE users.id = :user_id
+"""
+
+EXPANDED_INFO_STATEMENT = text(
+    INFO_STATEMENT.format(inventory=EXPANDED_INVENTORY)
+).columns(inventory=JSON, received=JSON, sent=JSON)
+
+AGGREGATED_INFO_STATEMENT = text(
+    INFO_STATEMENT.format(inventory=AGGREGATED_INVENTORY)
+).columns(inventory=JSON, received=JSON, sent=JSON)
+
+# The whole /api/info response body rendered by PostgreSQL, passed to the
+# client as is without decoding it into Python objects.
+INFO_DOCUMENT_STATEMENT = """
+    SELECT CAST(json_build_object(
+        'coins', info.coins,
+        'inventory', info.inventory,
+        'coinHistory', json_build_object(
+            'received', info.received, 'sent', info.sent
+        )
+    ) AS TEXT)
+    FROM ({info}) AS info
+"""
+
+EXPANDED_INFO_DOCUMENT_STATEMENT = text(
+    INFO_DOCUMENT_STATEMENT.format(
+        info=INFO_STATEMENT.format(inventory=EXPANDED_INVENTORY)
+    )
+)
+
+AGGREGATED_INFO_DOCUMENT_STATEMENT = text(
+    INFO_DOCUMENT_STATEMENT.format(
+        info=INFO_STATEMENT.format(inventory=AGGREGATED_INVENTORY)
+    )
+)
+
+
+class InfoService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_info(
+        self, user_id: int, aggregated: bool = False
+    ) -> InfoResponse | AggregatedInfoResponse | None:
+        statement = AGGREGATED_INFO_STATEMENT if aggregated else EXPANDED_INFO_STATEMENT
+        result = await self.session.execute(
+            statement,
+            dict(user_id=user_id, history_limit=settings.INFO_HISTORY_LIMIT),
+        )
+        row = result.first()
+
+        if not row:
+            return None
+
+        response_model = AggregatedInfoResponse if aggregated else InfoResponse
+        return response_model(
+            coins=row.coins,
+            inventory=row.inventory,
+            coinHistory=CoinHistory(received=row.received, sent=row.sent),
+        )
+
+    async def get_info_json(
+        self, user_id: int, aggregated: bool = False
+    ) -> bytes | None:
+        statement = (
+            AGGREGATED_INFO_DOCUMENT_STATEMENT
+            if aggregated
+            else EXPANDED_INFO_DOCUMENT_STATEMENT
+        )
+        body = await self.session.scalar(
+            statement,
+            dict(user_id=user_id, history_limit=settings.INFO_HISTORY_LIMIT),
+        )
+        return body.encode() if body is not None else None
+
+    # Fallback for when the aggregated statement is too heavy: the independent
+    # queries run at the same time, each on its own pooled connection.
+    @staticmethod
+    async def get_info_concurrently(
+        session_factory: async_sessionmaker, user_id: int, aggregated: bool = False
+    ) -> InfoResponse | AggregatedInfoResponse | None:
+        async def get_balance():
+            async with session_factory() as session:
+                return await CreditService(session).get_balance(user_id)
+
+        async def get_items():
+            async with session_factory() as session:
+                inventory_service = InventoryService(session)
+                if aggregated:
+                    return await inventory_service.get_user_inventory_aggregated(
+                        user_id
+                    )
+                return await inventory_service.get_user_inventory_items(user_id)
+
+        async def get_sent_transactions():
+            async with session_factory() as session:
+                transaction_service = TransactionService(session)
+                return await transaction_service.get_sent_transactions(
+                    user_id, settings.INFO_HISTORY_LIMIT
+                )
+
+        async def get_received_transactions():
+            async with session_factory() as session:
+                transaction_service = TransactionService(session)
+                return await transaction_service.get_received_transactions(
+                    user_id, settings.INFO_HISTORY_LIMIT
+                )
+
+        (
+            coins,
+            items,
+            sent_transactions,
+            received_transactions,
+        ) = await asyncio.gather(
+            get_balance(),
+            get_items(),
+            get_sent_transactions(),
+            get_received_transactions(),
+        )
+
+        if coins is None:
+            return None
+
+        coin_history = CoinHistory(
+            received=received_transactions, sent=sent_transactions
+        )
+
+        response_model = AggregatedInfoResponse if aggregated else InfoResponse
+        return response_model(
+            coins=coins,
+            inventory=items,
+            coinHistory=coin_history,
+        )
@@ -1,45 +1,39 @@
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import insert
 
 from app.api.v1.store.models import Inventory, InventoryItem, Item
-from app.api.v1.store.schemas import Item as ItemSchema
+from app.api.v1.store.schemas import InventoryEntry, Item as ItemSchema
 
 
 class InventoryService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_or_create_inventory_for_user(self, user_id: int) -> Inventory:
+    async def get_user_inventory_items(self, user_id: int) -> list[InventoryItem]:
         result = await self.session.execute(
-            insert(Inventory)
-            .values(user_id=user_id)
-            .on_conflict_do_nothing(index_elements=["user_id"])
-            .returning(Inventory)
+            select(InventoryItem.quantity, Item.type, Item.cost)
+            .join(Inventory, InventoryItem.inventory_id == Inventory.id)
+            .join(Item, InventoryItem.item_id == Item.id)
+            .filter(Inventory.user_id == user_id)
         )
 
-        inventory = result.scalar()
-
-        if not inventory:
-            result = await self.session.execute(
-                select(Inventory).filter_by(user_id=user_id)
-            )
-            inventory = result.scalar()
-
-        await self.session.flush()
+        items = []
+        for quantity, type, cost in result:
+            for _ in range(quantity):
+                items.append(ItemSchema(type=type, cost=cost))
 
-        return inventory
+        return items
 
-    async def get_inventory_items(self, inventory_id: int) -> list[InventoryItem]:
+    async def get_user_inventory_aggregated(self, user_id: int) -> list[InventoryEntry]:
         result = await self.session.execute(
-            select(InventoryItem, Item)
-            .join(Item, InventoryItem.item_id == Item.id)
-            .filter(InventoryItem.inventory_id == inventory_id)
+            select(Item.type, func.sum(InventoryItem.quantity))
+            .join(InventoryItem, InventoryItem.item_id == Item.id)
+            .join(Inventory, InventoryItem.inventory_id == Inventory.id)
+            .filter(Inventory.user_id == user_id)
+            .group_by(Item.type)
+            .order_by(Item.type)
         )
 
-        items = []
-        for item in result:
-            for _ in range(item[0].quantity):
-                items.append(ItemSchema(type=item[1].type, cost=item[1].cost))
-
-        return items
+        return [
+            InventoryEntry(type=type, quantity=quantity) for type, quantity in result
+        ]
@@ -0,0 +1,124 @@
+import re
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+PARENT_TABLE = "transactions"
+PARTITION_NAME = re.compile(r"^transactions_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def is_partition(name: str) -> bool:
+    return partition_month(name) is not None
+
+
+ATTACHED_PARTITIONS_STATEMENT = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = CAST(:parent AS regclass)
+    """
+)
+
+DETACHED_PARTITIONS_STATEMENT = text(
+    """
+    SELECT relname FROM pg_class
+    WHERE relkind = 'r'
+        AND NOT relispartition
+        AND relnamespace = CAST(current_schema() AS regnamespace)
+        AND relname ~ '^transactions_y[0-9]{4}m[0-9]{2}$'
+    """
+)
+
+
+class PartitionService:
+    """Monthly range partitions of the transactions ledger.
+
+    Partitions are named transactions_yYYYYmMM and hold [month, next month).
+    Inserting a row outside of all of them fails, so they are created ahead of
+    time (see PartitionMaintainer).
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_partitions(self) -> list[date]:
+        result = await self.session.execute(
+            ATTACHED_PARTITIONS_STATEMENT, dict(parent=PARENT_TABLE)
+        )
+        months = [partition_month(name) for name in result.scalars()]
+        return sorted(month for month in months if month)
+
+    async def get_detached_partitions(self) -> list[date]:
+        result = await self.session.execute(DETACHED_PARTITIONS_STATEMENT)
+        return sorted(partition_month(name) for name in result.scalars())
+
+    async def create_partition(self, month: date):
+        # Created standalone and attached: ATTACH PARTITION takes a SHARE
+        # UPDATE EXCLUSIVE lock on the ledger, where CREATE TABLE ... PARTITION
+        # OF would block its reads and writes. Attaching clones the foreign
+        # keys, which locks users and items in SHARE ROW EXCLUSIVE mode and so
+        # blocks writes to them until the transaction commits. The CHECK
+        # constraint matching the bounds saves the scan validating them.
+        name, start, end = partition_name(month), month, add_months(month, 1)
+        await self.session.execute(
+            text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+                f"CHECK (timestamp >= '{start}' AND timestamp < '{end}')"
+            )
+        )
+        await self.session.execute(
+            text(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+        await self.session.execute(
+            text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+        )
+
+    async def ensure_partitions(self, first: date, last: date) -> list[date]:
+        """Creates the missing partitions of the months from `first` to `last`."""
+        existing = set(await self.get_partitions())
+        month, missing = month_start(first), []
+        while month <= last:
+            if month not in existing:
+                missing.append(month)
+            month = add_months(month, 1)
+
+        for month in missing:
+            await self.create_partition(month)
+
+        return missing
+
+    async def detach_partition(self, month: date):
+        await self.session.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition_name(month)}")
+        )
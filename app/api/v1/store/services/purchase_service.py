@@ -0,0 +1,97 @@
+import enum
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.store.services.credit_service import CreditService
+
+
+class PurchaseResult(enum.Enum):
+    OK = "ok"
+    INSUFFICIENT_FUNDS = "insufficient_funds"
+    UNKNOWN_ITEM = "unknown_item"
+    UNKNOWN_USER = "unknown_user"
+
+
+# The conditional debit, inventory upsert and ledger insert are data-modifying
+# CTEs of a single statement, so the user row is locked by exactly one round
+# trip and nothing is written unless the debit succeeds. Written as text()
+# because the PostgreSQL INSERT ... ON CONFLICT construct is not cacheable and
+# compiling this statement on every call costs more than executing it.
+# Buying several items of one type is still one debit of the total, one
+# inventory upsert and one ledger row carrying the quantity.
+PURCHASE_STATEMENT = text(
+    """
+    WITH item AS (
+        SELECT id, cost * CAST(:quantity AS INTEGER) AS cost
+        FROM items WHERE id = :item_id
+    ), debit AS (
+        UPDATE users SET coins = users.coins - item.cost
+        FROM item
+        WHERE users.id = :user_id AND users.coins >= item.cost
+        RETURNING users.id AS user_id, item.id AS item_id, item.cost AS cost
+    ), inventory AS (
+        INSERT INTO inventories (user_id)
+        SELECT user_id FROM debit
+        ON CONFLICT (user_id) DO UPDATE SET user_id = excluded.user_id
+        RETURNING id
+    ), inventory_item AS (
+        INSERT INTO inventory_items (inventory_id, item_id, quantity)
+        SELECT inventory.id, CAST(:item_id AS INTEGER), CAST(:quantity AS INTEGER)
+        FROM inventory
+        ON CONFLICT ON CONSTRAINT uq_inventory_item
+        DO UPDATE SET quantity = inventory_items.quantity + excluded.quantity
+        RETURNING id
+    ), ledger AS (
+        INSERT INTO transactions (
+            user_id, amount, type, timestamp, item_id, quantity
+        )
+        SELECT user_id, cost, CAST('PURCHASE' AS transactiontype),
+            CAST(:timestamp AS TIMESTAMP), item_id, CAST(:quantity AS INTEGER)
+        FROM debit
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM users WHERE id = :user_id) AS user_exists,
+        EXISTS (SELECT 1 FROM item) AS item_exists,
+        (SELECT count(*) FROM inventory_item) AS inventory_items,
+        (SELECT count(*) FROM ledger) AS transactions
+    """
+)
+
+
+class PurchaseService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def purchase(
+        self,
+        user_id: int,
+        item_id: int,
+        fold_credits: bool = False,
+        quantity: int = 1,
+    ) -> PurchaseResult:
+        if fold_credits:
+            await CreditService(self.session).fold(user_id)
+
+        result = await self.session.execute(
+            PURCHASE_STATEMENT,
+            dict(
+                user_id=user_id,
+                item_id=item_id,
+                quantity=quantity,
+                timestamp=datetime.now(),
+            ),
+        )
+        row = result.one()
+
+        if not row.user_exists:
+            return PurchaseResult.UNKNOWN_USER
+
+        if not row.item_exists:
+            return PurchaseResult.UNKNOWN_ITEM
+
+        if not row.transactions:
+            return PurchaseResult.INSUFFICIENT_FUNDS
+
+        return PurchaseResult.OK
@@ -1,10 +1,15 @@
-from sqlalchemy import select
+from sqlalchemy import Select, select, true, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from app.api.v1.auth.models import User
 from app.api.v1.store.models import Transaction, TransactionType
-from app.api.v1.store.schemas import TransactionFromUser, TransactionToUser
+from app.api.v1.store.schemas import (
+    ReceivedTransaction,
+    SentTransaction,
+    TransactionFromUser,
+    TransactionToUser,
+)
 
 
 class TransactionService:
@@ -38,13 +43,17 @@ class TransactionService:
 
         return transaction
 
-    async def get_sent_transactions(self, user_id: int) -> list[Transaction]:
+    async def get_sent_transactions(
+        self, user_id: int, limit: int | None = None
+    ) -> list[TransactionToUser]:
         result = await self.session.execute(
             select(Transaction, User)
             .join(User, Transaction.recipient_id == User.id)
             .filter(
                 Transaction.user_id == user_id, Transaction.type == TransactionType.GIFT
             )
+            .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+            .limit(limit)
         )
 
         return [
@@ -54,11 +63,15 @@ class TransactionService:
             for transaction in result
         ]
 
-    async def get_received_transactions(self, user_id: int) -> list[Transaction]:
+    async def get_received_transactions(
+        self, user_id: int, limit: int | None = None
+    ) -> list[TransactionFromUser]:
         result = await self.session.execute(
             select(Transaction, User)
             .join(User, Transaction.user_id == User.id)
             .filter(Transaction.recipient_id == user_id)
+            .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+            .limit(limit)
         )
 
         return [
@@ -67,3 +80,146 @@ class TransactionService:
             )
             for transaction in result
         ]
+
+    def sent_transactions_page_query(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Select:
+        query = (
+            select(
+                Transaction.id, Transaction.timestamp, Transaction.amount, User.username
+            )
+            .join(User, Transaction.recipient_id == User.id)
+            .filter(
+                Transaction.user_id == user_id, Transaction.type == TransactionType.GIFT
+            )
+        )
+        return self._paginate(query, limit, cursor, since, until)
+
+    def received_transactions_page_query(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Select:
+        query = (
+            select(
+                Transaction.id, Transaction.timestamp, Transaction.amount, User.username
+            )
+            .join(User, Transaction.user_id == User.id)
+            .filter(Transaction.recipient_id == user_id)
+        )
+        return self._paginate(query, limit, cursor, since, until)
+
+    # Pages are ordered newest first; one extra row tells whether there is a
+    # next page without a separate count. Plain bounds on the timestamp let
+    # PostgreSQL skip the ledger partitions outside of them, the row comparison
+    # of the cursor alone does not.
+    def _paginate(
+        self,
+        query: Select,
+        limit: int,
+        cursor: tuple[datetime, int] | None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> Select:
+        if since:
+            query = query.filter(Transaction.timestamp >= since)
+
+        if until:
+            query = query.filter(Transaction.timestamp < until)
+
+        if cursor:
+            query = query.filter(
+                Transaction.timestamp <= cursor[0],
+                tuple_(Transaction.timestamp, Transaction.id) < cursor,
+            )
+
+        return query.order_by(
+            Transaction.timestamp.desc(), Transaction.id.desc()
+        ).limit(limit + 1)
+
+    # Joins the page to the row of its owner: no rows at all means the user
+    # does not exist, a single row of NULLs is an empty page. This keeps the
+    # existence check in the same round trip as the page itself.
+    def _for_existing_user(self, query: Select, user_id: int) -> Select:
+        page = query.subquery()
+        return (
+            select(page)
+            .select_from(User)
+            .outerjoin(page, true())
+            .filter(User.id == user_id)
+            .order_by(page.c.timestamp.desc(), page.c.id.desc())
+        )
+
+    async def get_sent_transactions_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> tuple[list[SentTransaction], tuple[datetime, int] | None] | None:
+        result = await self.session.execute(
+            self._for_existing_user(
+                self.sent_transactions_page_query(user_id, limit, cursor, since, until),
+                user_id,
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        rows = [row for row in rows if row.id is not None]
+
+        transactions = [
+            SentTransaction(
+                toUser=row.username, amount=row.amount, timestamp=row.timestamp
+            )
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (rows[limit - 1].timestamp, rows[limit - 1].id)
+
+        return transactions, next_cursor
+
+    async def get_received_transactions_page(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: tuple[datetime, int] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> tuple[list[ReceivedTransaction], tuple[datetime, int] | None] | None:
+        result = await self.session.execute(
+            self._for_existing_user(
+                self.received_transactions_page_query(
+                    user_id, limit, cursor, since, until
+                ),
+                user_id,
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return None
+
+        rows = [row for row in rows if row.id is not None]
+
+        transactions = [
+            ReceivedTransaction(
+                fromUser=row.username, amount=row.amount, timestamp=row.timestamp
+            )
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (rows[limit - 1].timestamp, rows[limit - 1].id)
+
+        return transactions, next_cursor
@@ -0,0 +1,287 @@
+import enum
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.store.services.credit_service import CreditService
+
+
+class TransferResult(enum.Enum):
+    OK = "ok"
+    INSUFFICIENT_FUNDS = "insufficient_funds"
+    RECIPIENT_NOT_FOUND = "recipient_not_found"
+    UNKNOWN_SENDER = "unknown_sender"
+
+
+# Both balances change in one UPDATE after the sender and recipient rows are
+# locked in id order, so two users gifting each other concurrently can not
+# deadlock. A transfer to oneself leaves the balance unchanged but is still
+# recorded, like before.
+TRANSFER_STATEMENT = text(
+    """
+    WITH recipient AS (
+        SELECT id FROM users WHERE username = :recipient
+    ), locked AS (
+        SELECT id, coins FROM users
+        WHERE id = :sender_id OR id IN (SELECT id FROM recipient)
+        ORDER BY id
+        FOR UPDATE
+    ), funded AS (
+        SELECT id FROM locked WHERE id = :sender_id AND coins >= :amount
+    ), balances AS (
+        UPDATE users
+        SET coins = users.coins
+            - CASE WHEN users.id = :sender_id THEN :amount ELSE 0 END
+            + CASE WHEN users.id = recipient.id THEN :amount ELSE 0 END
+        FROM locked, recipient
+        WHERE users.id = locked.id AND EXISTS (SELECT 1 FROM funded)
+        RETURNING users.id
+    ), ledger AS (
+        INSERT INTO transactions (user_id, amount, type, timestamp, recipient_id)
+        SELECT funded.id, CAST(:amount AS INTEGER), CAST('GIFT' AS transactiontype),
+            CAST(:timestamp AS TIMESTAMP), recipient.id
+        FROM funded, recipient
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM locked WHERE id = :sender_id) AS sender_exists,
+        EXISTS (SELECT 1 FROM funded) AS funded,
+        EXISTS (SELECT 1 FROM recipient) AS recipient_exists,
+        (SELECT count(*) FROM balances) AS balances,
+        (SELECT count(*) FROM ledger) AS transactions
+    """
+)
+
+
+# Deferred crediting: only the sender's row is updated, the recipient gets a
+# pending credit instead. Recipients are referenced only by foreign keys, which
+# take KEY SHARE locks that do not conflict with each other or with balance
+# updates, so gifts to one popular user no longer queue on its row.
+# "sufficient" is read from the statement snapshot and only used to report why
+# nothing was debited.
+DEFERRED_TRANSFER_STATEMENT = text(
+    """
+    WITH recipient AS (
+        SELECT id FROM users WHERE username = :recipient
+    ), debit AS (
+        UPDATE users SET coins = users.coins - :amount
+        WHERE users.id = :sender_id
+            AND users.coins >= :amount
+            AND EXISTS (SELECT 1 FROM recipient)
+        RETURNING users.id
+    ), credit AS (
+        INSERT INTO pending_credits (user_id, amount)
+        SELECT recipient.id, CAST(:amount AS INTEGER) FROM debit, recipient
+        RETURNING id
+    ), ledger AS (
+        INSERT INTO transactions (user_id, amount, type, timestamp, recipient_id)
+        SELECT debit.id, CAST(:amount AS INTEGER), CAST('GIFT' AS transactiontype),
+            CAST(:timestamp AS TIMESTAMP), recipient.id
+        FROM debit, recipient
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM users WHERE id = :sender_id) AS sender_exists,
+        EXISTS (
+            SELECT 1 FROM users WHERE id = :sender_id AND coins >= :amount
+        ) AS sufficient,
+        EXISTS (SELECT 1 FROM recipient) AS recipient_exists,
+        (SELECT count(*) FROM credit) AS credits,
+        (SELECT count(*) FROM ledger) AS transactions
+    """
+)
+
+
+# The gifts of a batch as rows in request order, with the recipients resolved
+# in one join. Gifts to unknown users have no row in "recipients".
+BATCH_GIFTS = """
+    gifts AS (
+        SELECT gift.position, gift.username, gift.amount
+        FROM unnest(
+            CAST(:recipients AS VARCHAR[]), CAST(:amounts AS INTEGER[])
+        ) WITH ORDINALITY AS gift(username, amount, position)
+    ), recipients AS (
+        SELECT gifts.position, gifts.amount, users.id
+        FROM gifts JOIN users ON users.username = gifts.username
+    ), total AS (
+        SELECT
+            sum(amount) AS amount,
+            count(*) = (SELECT count(*) FROM recipients) AS recipients_exist
+        FROM gifts
+    )
+"""
+
+# TRANSFER_STATEMENT for several recipients: the sender and all recipients are
+# locked in id order, the total is checked against the balance once and every
+# balance changes in one UPDATE (gifts to the same user are summed first).
+# Either all gifts are applied or none.
+BATCH_TRANSFER_STATEMENT = text(
+    f"""
+    WITH {BATCH_GIFTS}, credits AS (
+        SELECT id, sum(amount) AS amount FROM recipients GROUP BY id
+    ), locked AS (
+        SELECT id, coins FROM users
+        WHERE id = :sender_id OR id IN (SELECT id FROM credits)
+        ORDER BY id
+        FOR UPDATE
+    ), sufficient AS (
+        SELECT locked.id FROM locked, total
+        WHERE locked.id = :sender_id AND locked.coins >= total.amount
+    ), funded AS (
+        SELECT sufficient.id FROM sufficient, total WHERE total.recipients_exist
+    ), balances AS (
+        UPDATE users
+        SET coins = users.coins
+            - CASE WHEN users.id = :sender_id THEN total.amount ELSE 0 END
+            + COALESCE(credits.amount, 0)
+        FROM locked LEFT JOIN credits ON credits.id = locked.id, total
+        WHERE users.id = locked.id AND EXISTS (SELECT 1 FROM funded)
+        RETURNING users.id
+    ), ledger AS (
+        INSERT INTO transactions (user_id, amount, type, timestamp, recipient_id)
+        SELECT funded.id, recipients.amount, CAST('GIFT' AS transactiontype),
+            CAST(:timestamp AS TIMESTAMP), recipients.id
+        FROM funded, recipients
+        ORDER BY recipients.position
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM locked WHERE id = :sender_id) AS sender_exists,
+        EXISTS (SELECT 1 FROM sufficient) AS sufficient,
+        (SELECT recipients_exist FROM total) AS recipients_exist,
+        (SELECT count(*) FROM balances) AS balances,
+        (SELECT count(*) FROM ledger) AS transactions
+    """
+)
+
+# DEFERRED_TRANSFER_STATEMENT for several recipients: one debit of the total
+# and a pending credit per gift.
+DEFERRED_BATCH_TRANSFER_STATEMENT = text(
+    f"""
+    WITH {BATCH_GIFTS}, debit AS (
+        UPDATE users SET coins = users.coins - total.amount
+        FROM total
+        WHERE users.id = :sender_id
+            AND users.coins >= total.amount
+            AND total.recipients_exist
+        RETURNING users.id
+    ), credit AS (
+        INSERT INTO pending_credits (user_id, amount)
+        SELECT recipients.id, recipients.amount FROM debit, recipients
+        ORDER BY recipients.id
+        RETURNING id
+    ), ledger AS (
+        INSERT INTO transactions (user_id, amount, type, timestamp, recipient_id)
+        SELECT debit.id, recipients.amount, CAST('GIFT' AS transactiontype),
+            CAST(:timestamp AS TIMESTAMP), recipients.id
+        FROM debit, recipients
+        ORDER BY recipients.position
+        RETURNING id
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM users WHERE id = :sender_id) AS sender_exists,
+        EXISTS (
+            SELECT 1 FROM users, total
+            WHERE users.id = :sender_id AND users.coins >= total.amount
+        ) AS sufficient,
+        (SELECT recipients_exist FROM total) AS recipients_exist,
+        (SELECT count(*) FROM credit) AS credits,
+        (SELECT count(*) FROM ledger) AS transactions
+    """
+)
+
+
+class TransferService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def transfer(
+        self, sender_id: int, recipient: str, amount: int, deferred: bool = False
+    ) -> TransferResult:
+        if deferred:
+            return await self._transfer_deferred(sender_id, recipient, amount)
+
+        result = await self.session.execute(
+            TRANSFER_STATEMENT,
+            dict(
+                sender_id=sender_id,
+                recipient=recipient,
+                amount=amount,
+                timestamp=datetime.now(),
+            ),
+        )
+        row = result.one()
+
+        if not row.sender_exists:
+            return TransferResult.UNKNOWN_SENDER
+
+        if not row.funded:
+            return TransferResult.INSUFFICIENT_FUNDS
+
+        if not row.recipient_exists:
+            return TransferResult.RECIPIENT_NOT_FOUND
+
+        return TransferResult.OK
+
+    async def transfer_batch(
+        self, sender_id: int, gifts: list[tuple[str, int]], deferred: bool = False
+    ) -> TransferResult:
+        """Sends every (recipient, amount) gift or none of them."""
+        if deferred:
+            # Credits received so far count towards the funds
+            await CreditService(self.session).fold(sender_id)
+
+        result = await self.session.execute(
+            DEFERRED_BATCH_TRANSFER_STATEMENT if deferred else BATCH_TRANSFER_STATEMENT,
+            dict(
+                sender_id=sender_id,
+                recipients=[recipient for recipient, _ in gifts],
+                amounts=[amount for _, amount in gifts],
+                timestamp=datetime.now(),
+            ),
+        )
+        row = result.one()
+
+        if row.transactions:
+            return TransferResult.OK
+
+        if not row.sender_exists:
+            return TransferResult.UNKNOWN_SENDER
+
+        if not row.sufficient:
+            return TransferResult.INSUFFICIENT_FUNDS
+
+        if not row.recipients_exist:
+            return TransferResult.RECIPIENT_NOT_FOUND
+
+        # Deferred mode reads the balance from the statement snapshot, a
+        # concurrent debit can still leave too little for the whole batch.
+        return TransferResult.INSUFFICIENT_FUNDS
+
+    async def _transfer_deferred(
+        self, sender_id: int, recipient: str, amount: int
+    ) -> TransferResult:
+        # Credits received so far count towards the funds
+        await CreditService(self.session).fold(sender_id)
+
+        result = await self.session.execute(
+            DEFERRED_TRANSFER_STATEMENT,
+            dict(
+                sender_id=sender_id,
+                recipient=recipient,
+                amount=amount,
+                timestamp=datetime.now(),
+            ),
+        )
+        row = result.one()
+
+        if row.transactions:
+            return TransferResult.OK
+
+        if not row.sender_exists:
+            return TransferResult.UNKNOWN_SENDER
+
+        if row.recipient_exists or not row.sufficient:
+            return TransferResult.INSUFFICIENT_FUNDS
+
+        return TransferResult.RECIPIENT_NOT_FOUND
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 
@@ -9,12 +10,142 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_ECHO: bool
 
+    # Connection pool of the application engine. Up to DB_POOL_SIZE
+    # connections are kept open and DB_MAX_OVERFLOW more are opened under
+    # load; a request waits at most DB_POOL_TIMEOUT for a free one.
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: timedelta = timedelta(seconds=30)
+    DB_POOL_RECYCLE: timedelta | None = timedelta(minutes=30)
+    DB_POOL_PRE_PING: bool = False
+    # Prepared statements cached per connection by asyncpg and by SQLAlchemy's
+    # asyncpg dialect. 0 disables both, e.g. behind pgbouncer in
+    # transaction mode.
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Server-side limits applied to every connection, None keeps the server's.
+    DB_STATEMENT_TIMEOUT: timedelta | None = None
+    DB_LOCK_TIMEOUT: timedelta | None = None
+
     TESTING_DB_NAME: str = "tests"
 
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     JWT_LIFESPAN: timedelta = timedelta(days=30)
 
+    # Validated token -> claims cache. Entries never outlive the token's "exp".
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_SIZE: int = 10_000
+    JWT_CACHE_TTL: timedelta = timedelta(minutes=10)
+
+    # Where bcrypt runs: "inline" blocks the event loop, "thread" and "process"
+    # offload it to a pool of HASHING_WORKERS (None means the executor default).
+    # At most HASHING_QUEUE_SIZE operations are handed to the pool at once,
+    # the rest wait on the event loop.
+    HASHING_EXECUTOR: Literal["inline", "thread", "process"] = "thread"
+    HASHING_WORKERS: int | None = None
+    HASHING_QUEUE_SIZE: int = 64
+
+    # Opt-in cache of recently verified credentials that lets repeated logins
+    # skip bcrypt. Entries are dropped once the stored password hash changes.
+    CREDENTIAL_CACHE_ENABLED: bool = False
+    CREDENTIAL_CACHE_SIZE: int = 10_000
+    CREDENTIAL_CACHE_TTL: timedelta = timedelta(minutes=5)
+
+    # The item catalog is cached in every process and reloaded on this
+    # interval or when a new version is announced on CATALOG_CHANNEL.
+    CATALOG_REFRESH_INTERVAL: timedelta = timedelta(minutes=5)
+    CATALOG_CHANNEL: str = "catalog_version"
+    CATALOG_MAX_AGE: int = 60
+
+    # "single" builds /api/info with one JSON-aggregating statement,
+    # "concurrent" runs its independent queries on separate connections.
+    INFO_QUERY_MODE: Literal["single", "concurrent"] = "single"
+    # /api/info shows only the most recent part of the coin history, the full
+    # history is paginated by /api/history/sent and /api/history/received.
+    INFO_HISTORY_LIMIT: int = 100
+    HISTORY_PAGE_MAX_LIMIT: int = 100
+
+    # "direct" credits a gift to the recipient's balance right away, locking its
+    # row. "deferred" appends it to pending_credits instead; pending credits
+    # count towards /api/info balances and are folded into the balance on the
+    # recipient's next purchase or gift, or by the compactor that runs every
+    # CREDIT_COMPACTION_INTERVAL in either mode.
+    TRANSFER_CREDIT_MODE: Literal["direct", "deferred"] = "direct"
+    # Most gifts accepted by one /api/sendCoin/batch request.
+    SEND_COIN_BATCH_MAX_SIZE: int = 100
+    # Most items bought by one /api/buy/{item}?quantity= request.
+    PURCHASE_MAX_QUANTITY: int = 1000
+    CREDIT_COMPACTION_INTERVAL: timedelta = timedelta(seconds=5)
+    CREDIT_COMPACTION_BATCH_SIZE: int = 10_000
+
+    # The transactions ledger is partitioned by month. Partitions are created
+    # LEDGER_PARTITIONS_AHEAD months in advance, checked on startup and every
+    # LEDGER_PARTITIONS_CHECK_INTERVAL. `python -m app.core.db.archive` moves
+    # partitions older than LEDGER_RETENTION_MONTHS to LEDGER_ARCHIVE_DIR.
+    LEDGER_PARTITIONS_AHEAD: int = 3
+    LEDGER_PARTITIONS_CHECK_INTERVAL: timedelta = timedelta(hours=6)
+    LEDGER_RETENTION_MONTHS: int = 24
+    LEDGER_ARCHIVE_DIR: str = "archive"
+
+    # Opt-in group commit for /api/buy and /api/sendCoin: operations arriving
+    # within WRITE_BATCH_MAX_WAIT of each other, up to WRITE_BATCH_MAX_SIZE,
+    # share one transaction and one commit.
+    WRITE_BATCHING_ENABLED: bool = False
+    WRITE_BATCH_MAX_SIZE: int = 64
+    WRITE_BATCH_MAX_WAIT: timedelta = timedelta(milliseconds=2)
+
+    # `python -m app.serve`: SERVER_WORKERS processes (None means one per CPU)
+    # share the listening socket. "auto" picks uvloop and httptools when they
+    # are installed. Past SERVER_LIMIT_CONCURRENCY open connections or tasks
+    # per worker new requests get a 503 instead of queueing.
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8080
+    SERVER_WORKERS: int | None = None
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: timedelta = timedelta(seconds=5)
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    # Every worker opens up to
+    #     DB_POOL_SIZE + DB_MAX_OVERFLOW
+    #     + 1 (catalog LISTEN) + 1 (slow query EXPLAIN, if enabled)
+    # connections, the application as a whole SERVER_WORKERS times that.
+    # `app.serve` lowers the pool of each worker so that the total stays
+    # within DB_MAX_CONNECTIONS, which has to leave part of PostgreSQL's
+    # max_connections (100 by default) to migrations and administration.
+    DB_MAX_CONNECTIONS: int = 80
+
+    # Prometheus metrics at /metrics: request latency by route, database
+    # statement timing, pool waits and password hashing time.
+    METRICS_ENABLED: bool = True
+
+    # Per-request profiler reporting statement, auth and serialization time in
+    # a Server-Timing header. Profiles PROFILER_SAMPLE_RATE of the requests
+    # and, if PROFILER_HEADER_ENABLED, requests sending PROFILER_HEADER.
+    # Profiled requests slower than PROFILER_SLOW_REQUEST are logged, as are
+    # statements repeated PROFILER_N_PLUS_ONE_THRESHOLD times in one request.
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_HEADER_ENABLED: bool = False
+    PROFILER_HEADER: str = "X-Profile"
+    PROFILER_SLOW_REQUEST: timedelta = timedelta(milliseconds=500)
+    PROFILER_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Opt-in: statements slower than SLOW_QUERY_THRESHOLD have their plan
+    # captured with EXPLAIN (ANALYZE, BUFFERS) on a side connection, at most
+    # once per SLOW_QUERY_EXPLAIN_INTERVAL for the same query. ANALYZE runs the
+    # statement again and the plans show its parameter values; the last
+    # SLOW_QUERY_BUFFER_SIZE of them are served at /api/internal/slow-queries.
+    SLOW_QUERY_THRESHOLD: timedelta | None = None
+    SLOW_QUERY_EXPLAIN_INTERVAL: timedelta = timedelta(minutes=10)
+    SLOW_QUERY_EXPLAIN_TIMEOUT: timedelta = timedelta(seconds=10)
+    SLOW_QUERY_BUFFER_SIZE: int = 50
+
+    # Diagnostics under /api/internal (pool statistics, slow query plans).
+    # Mounted only when INTERNAL_API_ENABLED and answered only to requests
+    # sending INTERNAL_API_TOKEN as a bearer token.
+    INTERNAL_API_ENABLED: bool = False
+    INTERNAL_API_TOKEN: str | None = None
+
     @property
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}/{self.DB_NAME}"
@@ -0,0 +1,101 @@
+"""Archives old partitions of the transactions ledger.
+
+    python -m app.core.db.archive [--keep-months N] [--output-dir DIR] [--dry-run]
+
+Monthly partitions older than the last N months (LEDGER_RETENTION_MONTHS by
+default) are detached, exported to DIR/transactions_yYYYYmMM.csv.gz and
+dropped. A partition is only dropped once its export is complete; partitions
+left detached by an interrupted run are picked up by the next one.
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+from datetime import date
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.v1.store.services.partition_service import (
+    PartitionService,
+    add_months,
+    month_start,
+    partition_name,
+)
+from app.core.config import settings
+from app.core.db.engine import engine
+
+
+async def export_partition(engine: AsyncEngine, month: date, output_dir: Path) -> Path:
+    name = partition_name(month)
+    path = output_dir / f"{name}.csv.gz"
+    partial = output_dir / f"{name}.csv.gz.partial"
+
+    async with engine.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        with open(partial, "wb") as file:
+            with gzip.GzipFile(fileobj=file, mode="wb") as compressed:
+                await raw_connection.driver_connection.copy_from_table(
+                    name, output=compressed, format="csv", header=True
+                )
+            file.flush()
+            os.fsync(file.fileno())
+
+    os.replace(partial, path)
+    return path
+
+
+async def archive_partitions(
+    engine: AsyncEngine, before: date, output_dir: Path, dry_run: bool = False
+) -> list[Path]:
+    """Archives the partitions of the months before `before`."""
+    async with AsyncSession(engine) as session:
+        partition_service = PartitionService(session)
+        attached = [m for m in await partition_service.get_partitions() if m < before]
+        detached = [
+            m for m in await partition_service.get_detached_partitions() if m < before
+        ]
+
+        if dry_run:
+            return [
+                output_dir / f"{partition_name(m)}.csv.gz"
+                for m in sorted(attached + detached)
+            ]
+
+        for month in attached:
+            await partition_service.detach_partition(month)
+            await session.commit()
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for month in sorted(attached + detached):
+        paths.append(await export_partition(engine, month, output_dir))
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE {partition_name(month)}"))
+
+    return paths
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.db.archive")
+    parser.add_argument(
+        "--keep-months", type=int, default=settings.LEDGER_RETENTION_MONTHS
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path(settings.LEDGER_ARCHIVE_DIR)
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    before = add_months(month_start(date.today()), -args.keep_months)
+    paths = await archive_partitions(engine, before, args.output_dir, args.dry_run)
+    await engine.dispose()
+
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.db.engine import async_session
+
+
+Operation = Callable[[AsyncSession], Awaitable[Any]]
+
+# deadlock_detected, serialization_failure
+RETRYABLE_SQLSTATES = {"40P01", "40001"}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return (
+        isinstance(exc, DBAPIError)
+        and getattr(exc.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+    )
+
+
+class WriteBatcher:
+    """Group commit for short write operations.
+
+    Operations submitted within `max_wait` of each other (at most `max_size`
+    of them) run one after another in a single transaction, each inside its
+    own savepoint, and are committed together. A failing operation only rolls
+    back its savepoint: its caller gets the exception, the rest of the batch
+    is unaffected. Results are handed out after the commit.
+
+    Batches of different processes lock rows in no particular order. An
+    operation picked as a deadlock victim can not be retried in its batch,
+    which still holds the locks the other side waits for, so it is rerun on
+    its own once the batch has committed.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_size: int,
+        max_wait: float,
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.operations = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, operation: Operation) -> Any:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        elif self._task.done():
+            # The batching task died (it was cancelled or crashed). A new one
+            # takes over what is still queued, otherwise callers would wait
+            # forever; the queue is rebuilt in case the old one belongs to an
+            # event loop that is gone.
+            queue, self._queue = self._queue, asyncio.Queue()
+            while not queue.empty():
+                self._queue.put_nowait(queue.get_nowait())
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))
+        return await future
+
+    async def stop(self):
+        """Applies everything submitted so far and stops the batching task."""
+        if self._task is None:
+            return
+
+        self._queue.put_nowait(None)
+        task, self._task = self._task, None
+        await task
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                await self._apply(batch)
+
+    async def _collect(self) -> tuple[list[tuple[Operation, asyncio.Future]], bool]:
+        batch = []
+        deadline = None
+
+        while len(batch) < self.max_size:
+            if batch and self._queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+            else:
+                entry = await self._queue.get()
+
+            # None is put by stop()
+            if entry is None:
+                return batch, True
+
+            if not batch:
+                deadline = asyncio.get_running_loop().time() + self.max_wait
+            batch.append(entry)
+
+        return batch, False
+
+    async def _apply(self, batch: list[tuple[Operation, asyncio.Future]]):
+        outcomes = []
+        retries = []
+
+        try:
+            async with self.session_factory() as session, session.begin():
+                for operation, future in batch:
+                    if future.done():
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            result = await operation(session)
+                    except Exception as exc:
+                        if is_retryable(exc):
+                            retries.append((operation, future))
+                        else:
+                            outcomes.append((future, None, exc))
+                    else:
+                        outcomes.append((future, result, None))
+        except Exception as exc:
+            # Nothing of the batch was committed
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.operations += len(outcomes)
+
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+        for operation, future in retries:
+            await self._apply_alone(operation, future)
+
+    async def _apply_alone(self, operation: Operation, future: asyncio.Future):
+        try:
+            async with self.session_factory() as session, session.begin():
+                result = await operation(session)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.operations += 1
+        if not future.done():
+            future.set_result(result)
+
+
+write_batcher = WriteBatcher(
+    async_session,
+    max_size=settings.WRITE_BATCH_MAX_SIZE,
+    max_wait=settings.WRITE_BATCH_MAX_WAIT.total_seconds(),
+)
@@ -1,6 +1,11 @@
-from app.core.db.engine import async_session
+from app.core.db.engine import async_session, read_only_async_session
 
 
 async def get_session():
     async with async_session() as session:
         yield session
+
+
+async def get_read_only_session():
+    async with read_only_async_session() as session:
+        yield session
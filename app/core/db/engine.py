@@ -1,7 +1,59 @@
+from datetime import timedelta
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.core.config import settings
+from app.core.db.pool import InstrumentedPool, pool_stats
+from app.core.db.slow_queries import slow_query_recorder
+from app.core.metrics import instrument_engine, register_pool
+from app.core import profiler
 
 
-engine = create_async_engine(url=settings.DB_URL, echo=settings.DB_ECHO)
+def _milliseconds(value: timedelta) -> str:
+    return f"{int(value.total_seconds() * 1000)}ms"
+
+
+def get_connect_args() -> dict:
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT is not None:
+        server_settings["statement_timeout"] = _milliseconds(
+            settings.DB_STATEMENT_TIMEOUT
+        )
+    if settings.DB_LOCK_TIMEOUT is not None:
+        server_settings["lock_timeout"] = _milliseconds(settings.DB_LOCK_TIMEOUT)
+
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": server_settings,
+    }
+
+
+engine = create_async_engine(
+    url=settings.DB_URL,
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT.total_seconds(),
+    pool_recycle=(
+        settings.DB_POOL_RECYCLE.total_seconds() if settings.DB_POOL_RECYCLE else -1
+    ),
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=get_connect_args(),
+)
+pool_stats.attach(engine)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    register_pool(pool_stats)
+if profiler.is_enabled():
+    profiler.profile_engine(engine)
+if settings.SLOW_QUERY_THRESHOLD is not None:
+    slow_query_recorder.attach(engine)
+
 async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Sessions for pure reads: every transaction is started READ ONLY, so
+# PostgreSQL rejects writes and can skip write-related bookkeeping.
+read_only_async_session = async_sessionmaker(
+    engine.execution_options(postgresql_readonly=True), expire_on_commit=False
+)
@@ -0,0 +1,20 @@
+from sqlalchemy import func, select
+
+
+# Keys of the cluster-wide advisory locks taken by the application.
+MIGRATIONS_LOCK = 7_100_001
+SEED_LOCK = 7_100_002
+CREDIT_COMPACTION_LOCK = 7_100_003
+LEDGER_PARTITIONS_LOCK = 7_100_004
+
+
+def advisory_xact_lock(key: int):
+    return select(func.pg_advisory_xact_lock(key))
+
+
+def advisory_lock(key: int):
+    return select(func.pg_advisory_lock(key))
+
+
+def advisory_unlock(key: int):
+    return select(func.pg_advisory_unlock(key))
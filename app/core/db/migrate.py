@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+from alembic.config import CommandLine, Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from app.api.v1.store.services.partition_service import is_partition
+from app.core.db.engine import engine
+
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def get_alembic_config() -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+# Ledger partitions are created at runtime and are not part of the models, so
+# autogenerate must not try to drop them.
+def include_name(name: str | None, type_: str, parent_names: dict) -> bool:
+    return not (type_ == "table" and name and is_partition(name))
+
+
+async def verify_schema_version():
+    script = ScriptDirectory.from_config(get_alembic_config())
+    expected = set(script.get_heads())
+
+    async with engine.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: set(
+                MigrationContext.configure(sync_conn).get_current_heads()
+            )
+        )
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {sorted(current) or 'none'}, "
+            f"expected {sorted(expected)}. "
+            "Run `python -m app.core.db.migrate upgrade head` first."
+        )
+
+
+# Alembic's own command line, configured without an alembic.ini:
+#   python -m app.core.db.migrate upgrade head
+#   python -m app.core.db.migrate current
+#   python -m app.core.db.migrate revision -m "message"
+def main(argv: list[str] | None = None):
+    cli = CommandLine(prog="python -m app.core.db.migrate")
+    options = cli.parser.parse_args(argv)
+
+    if not hasattr(options, "cmd"):
+        cli.parser.error("too few arguments")
+
+    cli.run_cmd(get_alembic_config(), options)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+import asyncio
+from alembic import context
+from sqlalchemy import Connection, pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.db.base import Base
+from app.core.db.locks import MIGRATIONS_LOCK, advisory_lock, advisory_unlock
+from app.core.db.migrate import include_name
+
+import app.api.v1.auth.models  # noqa: F401
+import app.api.v1.store.models  # noqa: F401
+
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    return context.config.get_main_option("sqlalchemy.url") or settings.DB_URL
+
+
+def run_migrations_offline():
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_name=include_name,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection):
+    # Replicas started together all run "upgrade head", the session-level lock
+    # makes them apply revisions one at a time. Alembic manages its own
+    # transactions, so the one that took the lock is committed first.
+    connection.execute(advisory_lock(MIGRATIONS_LOCK))
+    connection.commit()
+
+    try:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+            transaction_per_migration=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        connection.execute(advisory_unlock(MIGRATIONS_LOCK))
+        connection.commit()
+
+
+async def run_migrations_online():
+    engine = create_async_engine(get_url(), poolclass=pool.NullPool)
+
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+# Callers that already hold a connection (e.g. tests running inside an event
+# loop) pass it through config.attributes.
+elif (connection := context.config.attributes.get("connection")) is not None:
+    do_run_migrations(connection)
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,95 @@
+"""Initial schema
+
+The tables as Base.metadata.create_all created them before migrations were
+introduced. Databases that were created that way already have them, so the
+revision only creates what is missing and such databases are adopted by
+simply upgrading.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-02-20 12:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "users" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("coins", sa.Integer(), nullable=False),
+        sa.CheckConstraint("coins >= 0", name="check_coins_non_negative"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("username"),
+    )
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("cost", sa.Integer(), nullable=False),
+        sa.CheckConstraint("cost >= 0", name="check_cost_non_negative"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column(
+            "type", sa.Enum("PURCHASE", "GIFT", name="transactiontype"), nullable=False
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("recipient_id", sa.Integer(), nullable=True),
+        sa.Column("item_id", sa.Integer(), nullable=True),
+        sa.CheckConstraint("amount > 0", name="check_amount_positive"),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+        sa.ForeignKeyConstraint(["recipient_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "inventories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_table(
+        "inventory_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("inventory_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.CheckConstraint("quantity > 0", name="check_quantity_positive"),
+        sa.ForeignKeyConstraint(
+            ["inventory_id"], ["inventories.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("inventory_id", "item_id", name="uq_inventory_item"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inventory_items")
+    op.drop_table("inventories")
+    op.drop_table("transactions")
+    op.drop_table("items")
+    op.drop_table("users")
+    sa.Enum(name="transactiontype").drop(op.get_bind())
@@ -0,0 +1,122 @@
+"""Performance indexes
+
+Indexes for the coin history queries and a unique constraint on items.type,
+all built with CREATE INDEX CONCURRENTLY so existing tables stay writable.
+inventory_items(inventory_id) needs no index of its own: uq_inventory_item
+(inventory_id, item_id) already starts with it.
+
+items.type was not unique before, so the unique index would fail on a
+database with the same type seeded twice. Such duplicates are merged into the
+item with the lowest id first: inventory items and transactions are
+repointed to it, with the quantities of a user's inventory items summed.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-02-20 12:10:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DUPLICATE_ITEMS = """
+    WITH duplicates AS (
+        SELECT id, keep_id
+        FROM (SELECT id, min(id) OVER (PARTITION BY type) AS keep_id FROM items) AS i
+        WHERE id <> keep_id
+    )
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        DUPLICATE_ITEMS
+        + """
+        INSERT INTO inventory_items (inventory_id, item_id, quantity)
+        SELECT inventory_items.inventory_id, duplicates.keep_id,
+               sum(inventory_items.quantity)
+        FROM inventory_items
+        JOIN duplicates ON duplicates.id = inventory_items.item_id
+        GROUP BY inventory_items.inventory_id, duplicates.keep_id
+        ON CONFLICT ON CONSTRAINT uq_inventory_item
+        DO UPDATE SET quantity = inventory_items.quantity + excluded.quantity
+        """
+    )
+    op.execute(
+        DUPLICATE_ITEMS
+        + """
+        DELETE FROM inventory_items
+        USING duplicates
+        WHERE inventory_items.item_id = duplicates.id
+        """
+    )
+    op.execute(
+        DUPLICATE_ITEMS
+        + """
+        UPDATE transactions
+        SET item_id = duplicates.keep_id
+        FROM duplicates
+        WHERE transactions.item_id = duplicates.id
+        """
+    )
+    op.execute(
+        DUPLICATE_ITEMS
+        + "DELETE FROM items USING duplicates WHERE items.id = duplicates.id"
+    )
+
+    # CONCURRENTLY can not run inside a transaction block. IF NOT EXISTS makes
+    # a rerun after an interrupted build possible, but an invalid index left
+    # behind by a failed build has to be dropped by hand.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_transactions_user_id_type_timestamp_id "
+            'ON transactions (user_id, type, "timestamp", id) '
+            "INCLUDE (recipient_id, amount)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_transactions_recipient_id_timestamp_id "
+            'ON transactions (recipient_id, "timestamp", id) '
+            "INCLUDE (user_id, amount)"
+        )
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS items_type_key "
+            "ON items (type)"
+        )
+
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'items_type_key'
+            ) THEN
+                ALTER TABLE items
+                ADD CONSTRAINT items_type_key UNIQUE USING INDEX items_type_key;
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE items DROP CONSTRAINT IF EXISTS items_type_key")
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "ix_transactions_recipient_id_timestamp_id"
+        )
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "ix_transactions_user_id_type_timestamp_id"
+        )
@@ -0,0 +1,138 @@
+"""Partition transactions by month
+
+Rebuilds transactions as a table partitioned by RANGE (timestamp) with one
+partition per month from the oldest transaction up to LEDGER_PARTITIONS_AHEAD
+months ahead. The rows are copied under an exclusive lock, so the upgrade
+blocks writes to the ledger while it runs.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-02-26 10:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    "ix_transactions_user_id_type_timestamp_id": (
+        ["user_id", "type", "timestamp", "id"],
+        ["recipient_id", "amount"],
+    ),
+    "ix_transactions_recipient_id_timestamp_id": (
+        ["recipient_id", "timestamp", "id"],
+        ["user_id", "amount"],
+    ),
+}
+
+COLUMNS = "id, user_id, amount, type, timestamp, recipient_id, item_id"
+
+
+def create_transactions_table(name: str, partitioned: bool):
+    op.create_table(
+        name,
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('transactions_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column(
+            "type",
+            postgresql.ENUM(
+                "PURCHASE", "GIFT", name="transactiontype", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("recipient_id", sa.Integer(), nullable=True),
+        sa.Column("item_id", sa.Integer(), nullable=True),
+        sa.CheckConstraint("amount > 0", name="check_amount_positive"),
+        sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+        sa.ForeignKeyConstraint(["recipient_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint(
+            *(["id", "timestamp"] if partitioned else ["id"]),
+            name="transactions_pkey",
+        ),
+        **({"postgresql_partition_by": "RANGE (timestamp)"} if partitioned else {}),
+    )
+    for index, (columns, include) in INDEXES.items():
+        op.create_index(index, name, columns, postgresql_include=include)
+    op.execute(f"ALTER SEQUENCE transactions_id_seq OWNED BY {name}.id")
+
+
+def rename_legacy_table(old: str, new: str):
+    # Index names are unique per schema, the new table needs the old ones
+    op.execute(f"LOCK TABLE {old} IN ACCESS EXCLUSIVE MODE")
+    op.rename_table(old, new)
+    op.execute(f"ALTER INDEX transactions_pkey RENAME TO {new}_pkey")
+    for index in INDEXES:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index.replace(old, new, 1)}")
+
+
+def upgrade() -> None:
+    rename_legacy_table("transactions", "transactions_unpartitioned")
+    create_transactions_table("transactions", partitioned=True)
+
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', LEAST(
+                        (SELECT min(timestamp) FROM transactions_unpartitioned),
+                        localtimestamp
+                    )),
+                    date_trunc('month', localtimestamp)
+                        + interval '{settings.LEDGER_PARTITIONS_AHEAD} months',
+                    interval '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF transactions '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'transactions_y' || to_char(month, 'YYYY"m"MM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM transactions_unpartitioned"
+    )
+    op.drop_table("transactions_unpartitioned")
+    op.execute("ANALYZE transactions")
+
+
+def downgrade() -> None:
+    rename_legacy_table("transactions", "transactions_partitioned")
+    create_transactions_table("transactions", partitioned=False)
+
+    op.execute(
+        f"INSERT INTO transactions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM transactions_partitioned"
+    )
+    # Drops the partitions as well
+    op.drop_table("transactions_partitioned")
@@ -0,0 +1,39 @@
+"""Transaction quantity
+
+A purchase records the number of items bought. The column is added to the
+partitioned parent and propagates to every partition; with a constant default
+PostgreSQL does not rewrite the partitions, but validating the check
+constraint reads each of them once under the ALTER TABLE lock.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-02-28 10:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transactions",
+        sa.Column("quantity", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.create_check_constraint(
+        "check_transaction_quantity_positive", "transactions", "quantity > 0"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "check_transaction_quantity_positive", "transactions", type_="check"
+    )
+    op.drop_column("transactions", "quantity")
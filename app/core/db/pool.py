@@ -0,0 +1,116 @@
+import time
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import POOL_WAIT
+
+
+class PoolStats:
+    """Counters fed by the pool events of the engine it is attached to.
+
+    The async pool is only used from the event loop thread, so plain
+    attributes are enough.
+    """
+
+    def __init__(self):
+        self.engine: Engine | None = None
+        self.reset()
+
+    def reset(self):
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def attach(self, engine: AsyncEngine):
+        # Listeners registered on the engine follow its pool through
+        # engine.dispose(), which replaces the pool object.
+        self.engine = engine.sync_engine
+        event.listen(self.engine, "connect", self._on_connect)
+        event.listen(self.engine, "close", self._on_close)
+        event.listen(self.engine, "invalidate", self._on_invalidate)
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        self.wait_count += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        POOL_WAIT.observe(seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        size = checked_out = idle = overflow = None
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            size = pool.size()
+            checked_out = pool.checkedout()
+            idle = pool.checkedin()
+            overflow = max(pool.overflow(), 0)
+
+        return {
+            "size": size,
+            "checkedOut": checked_out,
+            "idle": idle,
+            "overflow": overflow,
+            "connects": self.connects,
+            "closes": self.closes,
+            "invalidations": self.invalidations,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "waitCount": self.wait_count,
+            "waitTotalSeconds": self.wait_total,
+            "waitMaxSeconds": self.wait_max,
+            "waitAvgSeconds": (
+                self.wait_total / self.wait_count if self.wait_count else 0.0
+            ),
+        }
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self.closes += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checkins += 1
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports how long checkouts wait.
+
+    Pool events only fire once a connection has been handed out, so the time
+    spent queueing for one (or opening a new overflow connection) is measured
+    around the pool's own checkout and recorded in `stats`.
+    """
+
+    stats = pool_stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
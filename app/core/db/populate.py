@@ -1,27 +1,52 @@
-from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from .engine import async_session
+from .locks import SEED_LOCK, advisory_xact_lock
 from app.api.v1.store.schemas import Item as ItemSchema
 from app.api.v1.store.models import Item
+from app.api.v1.store.catalog import notify_catalog_changed
 
 
-async def populate_db():
-    items = [
-        ItemSchema(type="t-shirt", cost=80),
-        ItemSchema(type="cup", cost=20),
-        ItemSchema(type="book", cost=50),
-        ItemSchema(type="pen", cost=10),
-        ItemSchema(type="powerbank", cost=200),
-        ItemSchema(type="hoody", cost=300),
-        ItemSchema(type="umbrella", cost=200),
-        ItemSchema(type="socks", cost=10),
-        ItemSchema(type="wallet", cost=50),
-        ItemSchema(type="pink-hoody", cost=500),
-    ]
-    async with async_session() as session:
-        for item in items:
-            result = await session.execute(select(Item).filter_by(type=item.type))
-            item_in_db = result.scalar()
-            if not item_in_db:
-                item_to_add = Item(type=item.type, cost=item.cost)
-                session.add(item_to_add)
+CATALOG = (
+    ItemSchema(type="t-shirt", cost=80),
+    ItemSchema(type="cup", cost=20),
+    ItemSchema(type="book", cost=50),
+    ItemSchema(type="pen", cost=10),
+    ItemSchema(type="powerbank", cost=200),
+    ItemSchema(type="hoody", cost=300),
+    ItemSchema(type="umbrella", cost=200),
+    ItemSchema(type="socks", cost=10),
+    ItemSchema(type="wallet", cost=50),
+    ItemSchema(type="pink-hoody", cost=500),
+)
+
+
+async def seed_catalog(
+    session: AsyncSession, items: tuple[ItemSchema, ...] = CATALOG
+) -> int:
+    """Brings the items table in line with `items` in one statement.
+
+    Missing items are inserted and changed costs updated, items that already
+    match are left alone. Returns the number of rows written.
+    """
+    statement = insert(Item).values([item.model_dump() for item in items])
+    statement = statement.on_conflict_do_update(
+        index_elements=[Item.type],
+        set_={"cost": statement.excluded.cost},
+        where=Item.cost != statement.excluded.cost,
+    )
+    result = await session.execute(statement.returning(Item.id))
+    return len(result.all())
+
+
+async def populate_db(
+    session_factory: async_sessionmaker[AsyncSession] = async_session,
+):
+    async with session_factory() as session:
+        # Every worker seeds on startup, the lock lets the first one do it while
+        # the others wait and then find nothing to write.
+        await session.execute(advisory_xact_lock(SEED_LOCK))
+
+        if await seed_catalog(session):
+            await notify_catalog_changed(session)
         await session.commit()
@@ -0,0 +1,153 @@
+import asyncio
+import asyncpg
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.profiler import fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+class SlowQueryRecorder:
+    """Captures the plans of statements slower than SLOW_QUERY_THRESHOLD.
+
+    The engine listeners only time statements. A slow one schedules an
+    EXPLAIN (ANALYZE, BUFFERS) of the same statement and parameters on a side
+    connection, one at a time and at most once per SLOW_QUERY_EXPLAIN_INTERVAL
+    for every fingerprint. ANALYZE executes the statement again, so it runs in
+    a read-only transaction that is rolled back; statements that write are
+    explained without ANALYZE. The last plans are kept in a ring buffer.
+    """
+
+    def __init__(self, capacity: int = settings.SLOW_QUERY_BUFFER_SIZE):
+        self.plans: deque[dict] = deque(maxlen=capacity)
+        self.slow_statements = 0
+        self.connect_options: dict | None = None
+        self._connection: asyncpg.Connection | None = None
+        self._last_explained: dict[str, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def attach(self, engine: AsyncEngine):
+        url = engine.sync_engine.url
+        self.connect_options = dict(
+            user=url.username,
+            password=url.password,
+            host=url.host,
+            port=url.port,
+            database=url.database,
+        )
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        if started is None or threshold is None:
+            return
+
+        duration = time.perf_counter() - started
+        if duration >= threshold.total_seconds() and not executemany:
+            self.record(statement, parameters or (), duration)
+
+    def record(self, statement: str, parameters: tuple, duration: float):
+        self.slow_statements += 1
+        key = fingerprint(statement)
+        now = time.monotonic()
+        last = self._last_explained.get(key)
+        interval = settings.SLOW_QUERY_EXPLAIN_INTERVAL.total_seconds()
+        if self._tasks or (last is not None and now - last < interval):
+            return
+
+        if len(self._last_explained) >= 1000:
+            self._last_explained.clear()
+        self._last_explained[key] = now
+
+        task = asyncio.get_running_loop().create_task(
+            self.capture(key, statement, parameters, duration)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def capture(
+        self, key: str, statement: str, parameters: tuple, duration: float
+    ):
+        try:
+            plan, analyzed = await self.explain(statement, parameters)
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+            logger.exception("Could not explain a slow statement")
+            await self.close()
+            return
+
+        self.plans.append(
+            {
+                "fingerprint": key,
+                "statement": statement,
+                "durationMs": round(duration * 1000, 2),
+                "capturedAt": datetime.now(),
+                "analyzed": analyzed,
+                "seqScans": sorted(set(SEQ_SCAN.findall(plan))),
+                "plan": plan,
+            }
+        )
+
+    async def explain(self, statement: str, parameters: tuple) -> tuple[str, bool]:
+        connection = await self.connect()
+        transaction = connection.transaction(readonly=True)
+        await transaction.start()
+        try:
+            rows = await connection.fetch(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", *parameters
+            )
+            return "\n".join(row[0] for row in rows), True
+        except asyncpg.ReadOnlySQLTransactionError:
+            pass
+        finally:
+            await transaction.rollback()
+
+        rows = await connection.fetch(f"EXPLAIN {statement}", *parameters)
+        return "\n".join(row[0] for row in rows), False
+
+    async def connect(self) -> asyncpg.Connection:
+        if self._connection is None or self._connection.is_closed():
+            timeout = settings.SLOW_QUERY_EXPLAIN_TIMEOUT.total_seconds()
+            self._connection = await asyncpg.connect(
+                **self.connect_options,
+                server_settings={"statement_timeout": f"{int(timeout * 1000)}ms"},
+            )
+        return self._connection
+
+    async def wait(self):
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self):
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await self.wait()
+        await self.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "slowStatements": self.slow_statements,
+            "plans": list(reversed(self.plans)),
+        }
+
+
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,189 @@
+"""Prometheus metrics of the application, exposed at /metrics.
+
+With several server processes, app.serve points PROMETHEUS_MULTIPROC_DIR at a
+shared directory and every scrape aggregates the samples of all of them.
+"""
+
+import os
+import re
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+HASHING_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP responses by route template and status code.",
+    ["method", "route", "status"],
+)
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Database statement execution time by statement kind and table.",
+    ["statement"],
+    buckets=DB_BUCKETS,
+)
+STATEMENT_ERRORS = Counter(
+    "db_statement_errors_total",
+    "Database statements that raised, by statement kind and table.",
+    ["statement"],
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection.",
+    buckets=DB_BUCKETS,
+)
+PASSWORD_HASHING = Histogram(
+    "auth_password_hashing_seconds",
+    "Time spent hashing or verifying passwords, executor queueing included.",
+    ["operation"],
+    buckets=HASHING_BUCKETS,
+)
+CREDENTIAL_CACHE_LOOKUPS = Counter(
+    "auth_credential_cache_lookups_total",
+    "Verified-credential cache lookups by result (hit or miss).",
+    ["result"],
+)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and counts responses by status.
+
+    Requests are labelled with the path template of the matched route (set in
+    the scope by the router), never with the raw path, so that
+    /api/buy/{item} stays one series whatever items are asked for.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route else "unmatched")
+            REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start)
+            REQUESTS.labels(*labels, status).inc()
+
+
+STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([a-z_][a-z0-9_]*)", re.I)
+
+_statement_labels: dict[str, str] = {}
+
+
+def get_statement_label(statement: str) -> str:
+    """Statement kind and the first table it touches, e.g. "SELECT users".
+
+    Statements come from a fixed set in the code, but the labels are cached
+    by SQL text, so the cache is capped in case some text is generated.
+    """
+    label = _statement_labels.get(statement)
+    if label is None:
+        words = statement.split(None, 1)
+        kind = words[0].upper() if words else ""
+        table = STATEMENT_TABLE.search(statement)
+        label = f"{kind} {table.group(1)}" if table else kind
+        if len(_statement_labels) >= 1000:
+            _statement_labels.clear()
+        _statement_labels[statement] = label
+    return label
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    STATEMENT_DURATION.labels(get_statement_label(statement)).observe(
+        time.perf_counter() - started
+    )
+
+
+def _handle_error(context):
+    connection = context.connection
+    if connection is None or not connection.info.get("metrics_started"):
+        return
+    connection.info["metrics_started"].pop()
+    if context.statement:
+        STATEMENT_ERRORS.labels(get_statement_label(context.statement)).inc()
+
+
+def instrument_engine(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def uninstrument_engine(engine: AsyncEngine):
+    sync_engine = engine.sync_engine
+    event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(sync_engine, "handle_error", _handle_error)
+
+
+class PoolCollector:
+    """Current pool occupancy, read from the pool at scrape time."""
+
+    def __init__(self, pool_stats):
+        self.pool_stats = pool_stats
+
+    def collect(self):
+        snapshot = self.pool_stats.snapshot()
+        for key, name in (
+            ("size", "db_pool_size"),
+            ("checkedOut", "db_pool_checked_out"),
+            ("idle", "db_pool_idle"),
+            ("overflow", "db_pool_overflow"),
+        ):
+            if snapshot[key] is not None:
+                yield GaugeMetricFamily(name, f"Pool {key}.", value=snapshot[key])
+
+
+def register_pool(pool_stats):
+    # Gauges of a single process make no sense aggregated over workers.
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        REGISTRY.register(PoolCollector(pool_stats))
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,232 @@
+"""Opt-in per-request profiler.
+
+A profiled request records every SQL statement executed on the application
+engine while it is handled (fingerprint, duration, rows), the time spent in the
+auth dependency and the time between the endpoint returning and the response
+starting (validation, serialization and rendering). The totals go out in a
+Server-Timing header; slow requests and likely N+1 query patterns are logged
+as JSON.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def is_enabled() -> bool:
+    return settings.PROFILER_SAMPLE_RATE > 0 or settings.PROFILER_HEADER_ENABLED
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with literals and parameters replaced by ?, so that the
+    executions of one query with different values share a fingerprint."""
+    statement = LITERALS.sub("?", statement)
+    statement = LISTS.sub("(...)", statement)
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements: list[tuple[str, float, int]] = []
+        self.spans: dict[str, float] = defaultdict(float)
+        self.endpoint_finished: float | None = None
+        self.duration: float | None = None
+
+    def record_statement(self, statement: str, duration: float, rows: int):
+        self.statements.append((statement, duration, rows))
+
+    def response_started(self):
+        if self.endpoint_finished is not None:
+            self.spans["serialize"] += time.perf_counter() - self.endpoint_finished
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def get_statement_summary(self) -> list[dict]:
+        summary = {}
+        for statement, duration, rows in self.statements:
+            key = fingerprint(statement)
+            entry = summary.setdefault(
+                key, {"fingerprint": key, "count": 0, "duration": 0.0, "rows": 0}
+            )
+            entry["count"] += 1
+            entry["duration"] += duration
+            entry["rows"] += max(rows, 0)
+        return sorted(summary.values(), key=lambda entry: -entry["duration"])
+
+    def get_n_plus_one(self, summary: list[dict]) -> list[dict]:
+        threshold = settings.PROFILER_N_PLUS_ONE_THRESHOLD
+        return [entry for entry in summary if entry["count"] >= threshold]
+
+    def get_server_timing(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        db = sum(duration for _, duration, _ in self.statements)
+        metrics = [f'db;dur={db * 1000:.2f};desc="{len(self.statements)} queries"']
+        metrics += [
+            f"{name};dur={duration * 1000:.2f}" for name, duration in self.spans.items()
+        ]
+        metrics.append(f"total;dur={elapsed * 1000:.2f}")
+        for entry in self.get_n_plus_one(self.get_statement_summary()):
+            description = re.sub(r'["\\]', "", entry["fingerprint"])[:80]
+            metrics.append(f'n-plus-one;desc="{entry["count"]}x {description}"')
+        return ", ".join(metrics)
+
+    def to_dict(self) -> dict:
+        summary = self.get_statement_summary()
+        return {
+            "durationMs": round((self.duration or 0) * 1000, 2),
+            "spansMs": {
+                name: round(duration * 1000, 2) for name, duration in self.spans.items()
+            },
+            "statements": [
+                {**entry, "duration": round(entry["duration"] * 1000, 2)}
+                for entry in summary
+            ],
+            "nPlusOne": [
+                entry["fingerprint"] for entry in self.get_n_plus_one(summary)
+            ],
+        }
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+@contextmanager
+def profile_span(name: str):
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_profile.get() is not None:
+        context.profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "profiler_started", None)
+    profile = current_profile.get()
+    if started is not None and profile is not None:
+        profile.record_statement(
+            statement, time.perf_counter() - started, cursor.rowcount
+        )
+
+
+def profile_engine(engine: AsyncEngine):
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfiledRoute(APIRoute):
+    """Notes when the endpoint returns, everything until the response starts
+    is reported as serialization."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+
+        async def timed_call(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile = current_profile.get()
+                if profile is not None:
+                    profile.endpoint_finished = time.perf_counter()
+
+        self.dependant.call = timed_call
+
+
+class ProfilerMiddleware:
+    """Profiles PROFILER_SAMPLE_RATE of the requests and, when
+    PROFILER_HEADER_ENABLED, the requests sending PROFILER_HEADER."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def should_profile(self, scope: Scope) -> bool:
+        if settings.PROFILER_HEADER_ENABLED:
+            header = settings.PROFILER_HEADER.lower().encode()
+            if any(name == header for name, _ in scope["headers"]):
+                return True
+
+        rate = settings.PROFILER_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                profile.response_started()
+                # Prerendered responses are shared between requests (see
+                # app/api/v1/responses.py), their header list must not change.
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"server-timing", profile.get_server_timing().encode()),
+                    ],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profile.finish()
+            self.log(scope, status, profile)
+
+    def log(self, scope: Scope, status: int, profile: RequestProfile):
+        report = profile.to_dict()
+        slow = profile.duration >= settings.PROFILER_SLOW_REQUEST.total_seconds()
+        if not slow and not report["nPlusOne"]:
+            return
+
+        route = scope.get("route")
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_request" if slow else "n_plus_one",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route.path if route else None,
+                    "status": status,
+                    **report,
+                }
+            )
+        )
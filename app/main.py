@@ -1,21 +1,46 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
+from app.core.config import settings
+from app.core.db.batching import write_batcher
+from app.core.db.migrate import verify_schema_version
 from app.core.db.populate import populate_db
+from app.core.db.slow_queries import slow_query_recorder
+from app.core.metrics import MetricsMiddleware, metrics_endpoint
+from app.core import profiler
+from .api.v1.auth.security import shutdown_hashing_executor
+from .api.v1.store.catalog import catalog
+from .api.v1.store.credit_compactor import credit_compactor
+from .api.v1.store.partition_maintainer import partition_maintainer
 from .api.v1.auth.routes import router as auth_router
 from .api.v1.store.routes import router as store_router
-from .core.db.engine import engine
-from .core.db.base import Base
+from .api.v1.internal.routes import router as internal_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await verify_schema_version()
     await populate_db()
+    await partition_maintainer.start()
+    await catalog.start()
+    credit_compactor.start()
     yield
+    await write_batcher.stop()
+    await credit_compactor.stop()
+    await partition_maintainer.stop()
+    await slow_query_recorder.stop()
+    await catalog.stop()
+    shutdown_hashing_executor()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.include_router(auth_router, prefix="/api")
 app.include_router(store_router, prefix="/api")
+if settings.INTERNAL_API_ENABLED:
+    app.include_router(internal_router, prefix="/api")
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+if profiler.is_enabled():
+    app.add_middleware(profiler.ProfilerMiddleware)
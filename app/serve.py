@@ -0,0 +1,63 @@
+"""Production entry point: python -m app.serve
+
+Runs uvicorn with SERVER_WORKERS worker processes sharing one socket and the
+rest of the SERVER_* settings, with the database pool of every worker sized
+to fit DB_MAX_CONNECTIONS. Migrations are applied separately
+(`python -m app.core.db.migrate upgrade head`); the one-time seeding in the
+application lifespan is serialized between workers by an advisory lock.
+"""
+
+import os
+import tempfile
+import uvicorn
+
+from app.core.config import settings
+
+
+def get_server_options() -> dict:
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": settings.SERVER_WORKERS or os.cpu_count() or 1,
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": int(settings.SERVER_KEEP_ALIVE.total_seconds()),
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+    }
+
+
+def get_pool_options(workers: int) -> dict:
+    """Pool settings of every worker that keep the connections of all of them
+    within DB_MAX_CONNECTIONS."""
+    # The catalog listener and the slow query recorder's side connection
+    side_connections = 1 + (settings.SLOW_QUERY_THRESHOLD is not None)
+    budget = max(settings.DB_MAX_CONNECTIONS // workers - side_connections, 1)
+    pool_size = min(settings.DB_POOL_SIZE, budget)
+    return {
+        "DB_POOL_SIZE": pool_size,
+        "DB_MAX_OVERFLOW": min(settings.DB_MAX_OVERFLOW, budget - pool_size),
+    }
+
+
+def main():
+    options = get_server_options()
+    # A single worker runs in this process, the others read their settings
+    # from the environment.
+    for name, value in get_pool_options(options["workers"]).items():
+        setattr(settings, name, value)
+        os.environ[name] = str(value)
+    # Worker processes share their metrics through files in this directory,
+    # it has to be set before they import prometheus_client.
+    if (
+        options["workers"] > 1
+        and settings.METRICS_ENABLED
+        and "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+    ):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-")
+
+    uvicorn.run("app.main:app", **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import pytest
+from datetime import date
 import asyncpg
+from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import select
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.core.config import settings
 from app.core.db.base import Base
-from app.core.db.dependencies import get_session
-from app.api.v1.store.schemas import Item as ItemSchema
+from app.core.db.dependencies import get_read_only_session, get_session
+from app.core.db.populate import seed_catalog
+from app.api.v1.store.services.partition_service import PartitionService, add_months
+from app.api.v1.store.catalog import catalog
+from app.api.v1.internal.routes import router as internal_router
 from ..main import app
 
 from app.api.v1.auth.models import *
@@ -38,40 +43,44 @@ async def create_test_db():
     await conn.close()
 
 
-@pytest.fixture(autouse=True)
-async def db_tables_lifecycle():
+# Ledger partitions for the timestamps used by the tests
+async def create_ledger_partitions(engine):
+    async with AsyncSession(engine) as session:
+        await PartitionService(session).ensure_partitions(
+            date(2025, 1, 1),
+            add_months(date.today(), settings.LEDGER_PARTITIONS_AHEAD),
+        )
+        await session.commit()
+
+
+# Creates the schema once per test session.
+@pytest.fixture(scope="session")
+async def db_schema(create_test_db):
     engine = create_async_engine(url=settings.TESTING_DB_URL)
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+    await create_ledger_partitions(engine)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
 
-    items = [
-        ItemSchema(type="t-shirt", cost=80),
-        ItemSchema(type="cup", cost=20),
-        ItemSchema(type="book", cost=50),
-        ItemSchema(type="pen", cost=10),
-        ItemSchema(type="powerbank", cost=200),
-        ItemSchema(type="hoody", cost=300),
-        ItemSchema(type="umbrella", cost=200),
-        ItemSchema(type="socks", cost=10),
-        ItemSchema(type="wallet", cost=50),
-        ItemSchema(type="pink-hoody", cost=500),
-    ]
-    async with async_session() as session:
-        for item in items:
-            result = await session.execute(select(Item).filter_by(type=item.type))
-            item_in_db = result.scalar()
-            if not item_in_db:
-                item_to_add = Item(type=item.type, cost=item.cost)
-                session.add(item_to_add)
+
+# Every test starts with empty tables and the seeded catalog.
+@pytest.fixture(autouse=True)
+async def db_tables_lifecycle(db_schema):
+    tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    async with db_schema.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+    async with AsyncSession(db_schema) as session:
+        await seed_catalog(session)
         await session.commit()
+    catalog.clear()
 
     yield
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-
 
 @pytest.fixture(name="session")
 async def session_fixture():
@@ -87,9 +96,25 @@ async def client_fixture(session: AsyncSession):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_only_session] = get_session_override
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://localhost/api"
     ) as client:
         yield client
     app.dependency_overrides.clear()
+
+
+# The diagnostics router is not mounted on the application by default.
+@pytest.fixture(name="internal_client")
+async def internal_client_fixture(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-token")
+    internal_app = FastAPI()
+    internal_app.include_router(internal_router, prefix="/api")
+
+    async with AsyncClient(
+        transport=ASGITransport(app=internal_app),
+        base_url="http://localhost/api",
+        headers={"Authorization": "Bearer internal-token"},
+    ) as client:
+        yield client
@@ -1,9 +1,16 @@
 import pytest
 import uuid
+from datetime import datetime, timedelta
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.api.v1.auth.models import User
+from app.api.v1.auth.security import create_jwt
 from app.api.v1.auth.services.user_service import UserService
+from app.api.v1.store.catalog import notify_catalog_changed
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.config import settings
+from app.core.db.batching import write_batcher
 from app.api.v1.store.models import (
     Inventory,
     InventoryItem,
@@ -16,6 +23,20 @@ from app.api.v1.store.models import (
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(name="batched_writes")
+async def batched_writes_fixture(monkeypatch):
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    monkeypatch.setattr(settings, "WRITE_BATCHING_ENABLED", True)
+    monkeypatch.setattr(
+        write_batcher,
+        "session_factory",
+        async_sessionmaker(engine, expire_on_commit=False),
+    )
+    yield write_batcher
+    await write_batcher.stop()
+    await engine.dispose()
+
+
 async def test_buy_item(client, session):
     username = f"user_{uuid.uuid4()}"
 
@@ -154,6 +175,40 @@ async def test_buy_same_item(client, session):
     assert second_transaction.item_id == item.id
 
 
+async def test_buy_item_quantity(client, session):
+    response = await client.post(
+        "/auth", json={"username": "quantity_buyer", "password": "Secretpassword"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    response = await client.get("/buy/pen?quantity=20", headers=headers)
+    assert response.status_code == 200
+    response = await client.get("/buy/pen", headers=headers)
+    assert response.status_code == 200
+
+    for quantity in (0, settings.PURCHASE_MAX_QUANTITY + 1):
+        response = await client.get(f"/buy/pen?quantity={quantity}", headers=headers)
+        assert response.status_code == 422
+
+    response = await client.get("/buy/pen?quantity=80", headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get("/info?inventory=aggregated", headers=headers)
+    assert response.json()["coins"] == 790
+    assert response.json()["inventory"] == [{"type": "pen", "quantity": 21}]
+
+    response = await client.get("/info", headers=headers)
+    assert response.json()["inventory"] == [{"type": "pen", "cost": 10}] * 21
+
+    result = await session.execute(
+        select(Transaction.amount, Transaction.quantity)
+        .join(User, User.id == Transaction.user_id)
+        .filter(User.username == "quantity_buyer")
+        .order_by(Transaction.id)
+    )
+    assert result.all() == [(200, 20), (10, 1)]
+
+
 async def test_buy_item_insufficient_balance(client, session):
     username = f"user_{uuid.uuid4()}"
 
@@ -260,6 +315,9 @@ async def test_send_coin(client, session):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert response.status_code == 200
+
+    await session.refresh(user)
+    await session.refresh(recipient)
     assert user.coins == 650
     assert recipient.coins == 1350
 
@@ -273,6 +331,66 @@ async def test_send_coin(client, session):
     assert transaction.amount == 350
 
 
+async def test_buy_and_send_coin_batched(client, session, batched_writes):
+    tokens = {}
+    for username in ("batch_sender", "batch_recipient"):
+        response = await client.post(
+            "/auth", json={"username": username, "password": "Secretpassword"}
+        )
+        tokens[username] = response.json()["token"]
+    headers = {"Authorization": f"Bearer {tokens['batch_sender']}"}
+
+    response = await client.get("/buy/cup", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/sendCoin", json={"amount": 100, "toUser": "batch_recipient"}, headers=headers
+    )
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/sendCoin", json={"amount": 5000, "toUser": "batch_recipient"}, headers=headers
+    )
+    assert response.status_code == 400
+
+    result = await session.execute(
+        select(User.username, User.coins).order_by(User.username)
+    )
+    assert result.all() == [("batch_recipient", 1100), ("batch_sender", 880)]
+    assert batched_writes.operations >= 3
+
+
+async def test_send_coin_deferred_credit(client, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSFER_CREDIT_MODE", "deferred")
+    tokens = {}
+    for username in ("deferred_sender", "deferred_recipient"):
+        response = await client.post(
+            "/auth", json={"username": username, "password": "Secretpassword"}
+        )
+        tokens[username] = response.json()["token"]
+
+    response = await client.post(
+        "/sendCoin",
+        json={"amount": 400, "toUser": "deferred_recipient"},
+        headers={"Authorization": f"Bearer {tokens['deferred_sender']}"},
+    )
+    assert response.status_code == 200
+
+    headers = {"Authorization": f"Bearer {tokens['deferred_recipient']}"}
+    response = await client.get("/info", headers=headers)
+    assert response.json()["coins"] == 1400
+
+    response = await client.get("/buy/pink-hoody", headers=headers)
+    assert response.status_code == 200
+    response = await client.get("/buy/pink-hoody", headers=headers)
+    assert response.status_code == 200
+    response = await client.get("/buy/pink-hoody", headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get("/info", headers=headers)
+    assert response.json()["coins"] == 400
+
+
 async def test_send_coin_insufficient_balance(client, session):
     username = f"user_{uuid.uuid4()}"
 
@@ -347,3 +465,301 @@ async def test_send_coin_invalid_recipient(client, session):
     transaction = result.scalar()
 
     assert not transaction
+
+
+async def test_send_coin_batch(client, session):
+    tokens = {}
+    for username in ("batch_gifter", "first_recipient", "second_recipient"):
+        response = await client.post(
+            "/auth", json={"username": username, "password": "Secretpassword"}
+        )
+        tokens[username] = response.json()["token"]
+    headers = {"Authorization": f"Bearer {tokens['batch_gifter']}"}
+
+    response = await client.post(
+        "/sendCoin/batch",
+        json=[
+            {"toUser": "first_recipient", "amount": 300},
+            {"toUser": "second_recipient", "amount": 200},
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    for gifts in (
+        # Unknown recipient
+        [
+            {"toUser": "first_recipient", "amount": 100},
+            {"toUser": "non-existant-recipient", "amount": 100},
+        ],
+        # The gifts fit the balance only one by one
+        [
+            {"toUser": "first_recipient", "amount": 300},
+            {"toUser": "second_recipient", "amount": 300},
+        ],
+    ):
+        response = await client.post("/sendCoin/batch", json=gifts, headers=headers)
+        assert response.status_code == 400
+
+    result = await session.execute(
+        select(User.username, User.coins)
+        .filter(User.username.in_(tokens))
+        .order_by(User.username)
+    )
+    assert result.all() == [
+        ("batch_gifter", 500),
+        ("first_recipient", 1300),
+        ("second_recipient", 1200),
+    ]
+
+    result = await session.execute(
+        select(Transaction.amount)
+        .join(User, User.id == Transaction.user_id)
+        .filter(User.username == "batch_gifter")
+    )
+    assert sorted(result.scalars()) == [200, 300]
+
+
+async def test_send_coin_batch_validation(client):
+    gift = {"toUser": "recipient_user", "amount": 1}
+    response = await client.post("/sendCoin/batch", json=[gift])
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/auth", json={"username": "batch_validation", "password": "Secretpassword"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    for gifts in (
+        [],
+        [gift] * (settings.SEND_COIN_BATCH_MAX_SIZE + 1),
+        [{"toUser": "recipient_user", "amount": 0}],
+    ):
+        response = await client.post("/sendCoin/batch", json=gifts, headers=headers)
+        assert response.status_code == 422
+
+
+async def test_items(client):
+    response = await client.get("/items")
+    assert response.status_code == 200
+    assert {"type": "pink-hoody", "cost": 500} in response.json()
+    assert len(response.json()) == 10
+    assert response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+
+
+async def test_items_not_modified(client):
+    response = await client.get("/items")
+    etag = response.headers["etag"]
+
+    response = await client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+
+async def test_items_catalog_version_changes(client, session):
+    response = await client.get("/items")
+    etag = response.headers["etag"]
+
+    result = await session.execute(select(Item).filter_by(type="pen"))
+    item = result.scalar()
+    item.cost = 15
+    await session.flush()
+    await notify_catalog_changed(session)
+
+    response = await client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert {"type": "pen", "cost": 15} in response.json()
+
+
+async def test_info(client, session):
+    username = f"user_{uuid.uuid4()}"
+
+    response = await client.post(
+        "/auth",
+        json={
+            "username": username,
+            "password": "Secretpassword",
+        },
+    )
+    token = response.json()["token"]
+
+    user_service = UserService(session)
+    sender = await user_service.get_or_create_user(
+        username="sender_user", password="Secretpassword"
+    )
+    await session.commit()
+
+    response = await client.get(
+        "/buy/pen", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    response = await client.get(
+        "/buy/pen", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/sendCoin",
+        json={"amount": 100, "toUser": sender.username},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+
+    transaction_service = TransactionService(session)
+    await transaction_service.create_transaction(
+        user_id=sender.id,
+        amount=30,
+        type=TransactionType.GIFT,
+        recipient_id=(await user_service.get_user_by_username(username)).id,
+    )
+    await session.commit()
+
+    response = await client.get("/info", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "coins": 880,
+        "inventory": [{"type": "pen", "cost": 10}, {"type": "pen", "cost": 10}],
+        "coinHistory": {
+            "received": [{"fromUser": "sender_user", "amount": 30}],
+            "sent": [{"toUser": "sender_user", "amount": 100}],
+        },
+    }
+
+
+async def test_info_does_not_create_inventory(client, session):
+    username = f"user_{uuid.uuid4()}"
+
+    response = await client.post(
+        "/auth",
+        json={
+            "username": username,
+            "password": "Secretpassword",
+        },
+    )
+    token = response.json()["token"]
+
+    response = await client.get("/info", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["coins"] == 1000
+    assert response.json()["inventory"] == []
+
+    result = await session.execute(
+        select(Inventory).join(User).filter(User.username == username)
+    )
+    assert not result.scalar()
+
+
+async def test_info_not_authenticated(client):
+    response = await client.get("/info")
+    assert response.status_code == 401
+    assert response.json() == {"errors": "Invalid token"}
+
+    response = await client.get(
+        "/info", headers={"Authorization": "Bearer invalid-token"}
+    )
+    assert response.status_code == 401
+
+
+async def test_info_aggregated_inventory(client):
+    response = await client.post(
+        "/auth",
+        json={
+            "username": f"user_{uuid.uuid4()}",
+            "password": "Secretpassword",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    for item in ("pen", "pen", "pen", "cup"):
+        response = await client.get(f"/buy/{item}", headers=headers)
+        assert response.status_code == 200
+
+    response = await client.get("/info?inventory=aggregated", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["coins"] == 950
+    assert response.json()["inventory"] == [
+        {"type": "cup", "quantity": 1},
+        {"type": "pen", "quantity": 3},
+    ]
+
+    response = await client.get("/info", headers=headers)
+    assert len(response.json()["inventory"]) == 4
+
+    response = await client.get("/info?inventory=unknown", headers=headers)
+    assert response.status_code == 422
+
+
+async def test_history_pagination(client, session):
+    username = f"user_{uuid.uuid4()}"
+
+    response = await client.post(
+        "/auth",
+        json={
+            "username": username,
+            "password": "Secretpassword",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    user_service = UserService(session)
+    user = await user_service.get_user_by_username(username)
+    friend = await user_service.get_or_create_user(
+        username="friend_user", password="Secretpassword"
+    )
+
+    # Two of the gifts share a timestamp, the id breaks the tie
+    timestamp = datetime(2025, 1, 1)
+    for amount, minutes in ((1, 0), (2, 1), (3, 2), (4, 2), (5, 3)):
+        session.add(
+            Transaction(
+                user_id=user.id,
+                amount=amount,
+                type=TransactionType.GIFT,
+                timestamp=timestamp + timedelta(minutes=minutes),
+                recipient_id=friend.id,
+            )
+        )
+    await session.commit()
+
+    amounts, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/history/sent", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(t["toUser"] == "friend_user" for t in page["transactions"])
+        amounts += [t["amount"] for t in page["transactions"]]
+        cursor = page["nextCursor"]
+
+    assert amounts == [5, 4, 3, 2, 1]
+    assert cursor is None
+
+    response = await client.get("/history/received", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"transactions": [], "nextCursor": None}
+
+    response = await client.get(
+        "/history/sent", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json()["errors"] == "Invalid cursor"
+
+
+async def test_history_not_authenticated(client):
+    response = await client.get("/history/sent")
+    assert response.status_code == 401
+
+    response = await client.get("/history/received")
+    assert response.status_code == 401
+
+    # A valid token of a user that does not exist
+    headers = {"Authorization": f"Bearer {create_jwt({'sub': str(2**31 - 1)})}"}
+    response = await client.get("/history/sent", headers=headers)
+    assert response.status_code == 401
+    assert response.json() == {"errors": "Invalid token"}
+
+    response = await client.get("/history/received", headers=headers)
+    assert response.status_code == 401
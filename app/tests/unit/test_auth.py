@@ -1,9 +1,24 @@
+import asyncio
+import time
 import pytest
+from datetime import timedelta
 from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.api.v1.auth.credential_cache import credential_cache
 from app.api.v1.auth.models import User
-from app.api.v1.auth.security import get_password_hash
+from app.api.v1.auth.security import (
+    create_jwt,
+    decode_jwt,
+    get_sub_from_token,
+    token_cache,
+    get_password_hash,
+    get_password_hash_async,
+    shutdown_hashing_executor,
+    verify_password_async,
+)
 from app.api.v1.auth.services.user_service import UserService
+from app.core.config import settings
 
 
 pytestmark = pytest.mark.anyio
@@ -120,3 +135,122 @@ async def test_authenticate_user_wrong_password(session):
         "test_user", "Wrongpassword"
     )
     assert not is_authenticated
+
+
+async def test_login_new_user(session):
+    user_service = UserService(session)
+
+    user = await user_service.login("test_user", "Secretpassword")
+    assert user
+    assert user.username == "test_user"
+    assert user.coins == 1000
+
+    # Check that we store hashed password
+    assert user.password != "Secretpassword"
+
+
+async def test_login_existing_user(session):
+    user_service = UserService(session)
+
+    hashed_password = get_password_hash("Secretpassword")
+    user = User(username="test_user", password=hashed_password)
+    session.add(user)
+    await session.flush()
+    await session.refresh(user)
+
+    user_from_login = await user_service.login("test_user", "Secretpassword")
+    assert user_from_login
+    assert user_from_login.id == user.id
+
+
+async def test_login_existing_user_wrong_password(session):
+    user_service = UserService(session)
+
+    hashed_password = get_password_hash("Secretpassword")
+    user = User(username="test_user", password=hashed_password)
+    session.add(user)
+    await session.flush()
+
+    user_from_login = await user_service.login("test_user", "Wrongpassword")
+    assert not user_from_login
+
+
+async def test_login_concurrent_first_logins():
+    engine = create_async_engine(url=settings.TESTING_DB_URL)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def login():
+        async with async_session() as session:
+            user = await UserService(session).login("test_user", "Secretpassword")
+            await session.commit()
+            return user
+
+    users = await asyncio.gather(*(login() for _ in range(5)))
+    await engine.dispose()
+
+    assert all(users)
+    assert len({user.id for user in users}) == 1
+
+
+async def test_login_credential_cache(monkeypatch, session):
+    monkeypatch.setattr(settings, "CREDENTIAL_CACHE_ENABLED", True)
+    credential_cache.clear()
+    user_service = UserService(session)
+
+    # The first login creates the user, the second one fills the cache
+    user = await user_service.login("test_user", "Secretpassword")
+    assert await user_service.login("test_user", "Secretpassword")
+    hits = credential_cache.hits
+
+    assert await user_service.login("test_user", "Secretpassword")
+    assert credential_cache.hits == hits + 1
+
+    assert not await user_service.login("test_user", "Wrongpassword")
+
+    # Changing the password invalidates the cached credentials
+    user.password = get_password_hash("Newpassword")
+    await session.flush()
+    assert not await user_service.login("test_user", "Secretpassword")
+    assert await user_service.login("test_user", "Newpassword")
+
+
+def test_decode_jwt_cache():
+    token_cache.clear()
+    token = create_jwt({"sub": "1"})
+
+    assert get_sub_from_token(token) == "1"
+    hits = token_cache.hits
+    assert get_sub_from_token(token) == "1"
+    assert token_cache.hits == hits + 1
+
+    # Bypassing the cache neither reads nor fills it
+    assert get_sub_from_token(token, use_cache=False) == "1"
+    assert token_cache.hits == hits + 1
+
+    # Changes to a returned payload do not leak into the cache
+    decode_jwt(token)["sub"] = "2"
+    assert get_sub_from_token(token) == "1"
+
+
+def test_decode_jwt_cache_respects_exp(monkeypatch):
+    token_cache.clear()
+    monkeypatch.setattr(settings, "JWT_LIFESPAN", timedelta(seconds=5))
+    token = create_jwt({"sub": "1"})
+    decode_jwt(token)
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now + 10)
+    assert token_cache.get(token) is None
+
+
+@pytest.mark.parametrize("executor", ["inline", "thread", "process"])
+async def test_password_hashing_executor(monkeypatch, executor):
+    monkeypatch.setattr(settings, "HASHING_EXECUTOR", executor)
+
+    try:
+        hashed_password = await get_password_hash_async("Secretpassword")
+        assert hashed_password != "Secretpassword"
+        assert await verify_password_async("Secretpassword", hashed_password)
+        assert not await verify_password_async("Wrongpassword", hashed_password)
+    finally:
+        shutdown_hashing_executor()
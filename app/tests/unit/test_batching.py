@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.auth.models import User
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from app.core.config import settings
+from app.core.db.batching import WriteBatcher
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(name="session_factory")
+async def session_factory_fixture():
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def create_users(session_factory, count: int, coins: int) -> list[User]:
+    async with session_factory.begin() as session:
+        users = [
+            User(username=f"batch_user_{i}", password="-", coins=coins)
+            for i in range(count)
+        ]
+        session.add_all(users)
+    return users
+
+
+async def test_batched_transfers(session_factory):
+    users = await create_users(session_factory, 4, coins=10)
+    batcher = WriteBatcher(session_factory, max_size=64, max_wait=0.05)
+
+    def transfer(sender: User, recipient: User, amount: int):
+        return lambda session: TransferService(session).transfer(
+            sender.id, recipient.username, amount
+        )
+
+    results = await asyncio.gather(
+        *(
+            batcher.submit(transfer(users[i % 4], users[(i + 1) % 4], 1))
+            for i in range(40)
+        ),
+        batcher.submit(transfer(users[0], users[1], 1000)),
+    )
+    await batcher.stop()
+
+    assert results[:40] == [TransferResult.OK] * 40
+    assert results[40] == TransferResult.INSUFFICIENT_FUNDS
+    assert batcher.operations == 41
+    assert batcher.batches < 41
+
+    async with session_factory() as session:
+        coins = (await session.execute(select(User.coins))).scalars().all()
+        transactions = await session.scalar(text("SELECT count(*) FROM transactions"))
+    assert coins == [10] * 4
+    assert transactions == 40
+
+
+async def test_failed_operation_only_rolls_back_itself(session_factory):
+    users = await create_users(session_factory, 2, coins=10)
+    batcher = WriteBatcher(session_factory, max_size=64, max_wait=0.05)
+
+    def set_coins(user: User, coins: int):
+        async def operation(session):
+            await session.execute(
+                text("UPDATE users SET coins = :coins WHERE id = :id"),
+                dict(coins=coins, id=user.id),
+            )
+            return coins
+
+        return operation
+
+    results = await asyncio.gather(
+        batcher.submit(set_coins(users[0], 5)),
+        batcher.submit(set_coins(users[1], -1)),
+        batcher.submit(set_coins(users[1], 7)),
+        return_exceptions=True,
+    )
+    await batcher.stop()
+
+    assert results[0] == 5
+    assert isinstance(results[1], IntegrityError)
+    assert results[2] == 7
+    assert batcher.batches == 1
+
+    async with session_factory() as session:
+        coins = (await session.execute(select(User.coins).order_by(User.id))).all()
+    assert [row.coins for row in coins] == [5, 7]
+
+
+async def test_stop_applies_pending_operations(session_factory):
+    users = await create_users(session_factory, 1, coins=10)
+    batcher = WriteBatcher(session_factory, max_size=64, max_wait=10)
+
+    async def debit(session):
+        await session.execute(
+            text("UPDATE users SET coins = coins - 1 WHERE id = :id"),
+            dict(id=users[0].id),
+        )
+
+    pending = [asyncio.ensure_future(batcher.submit(debit)) for _ in range(3)]
+    await asyncio.sleep(0)
+    await batcher.stop()
+    await asyncio.gather(*pending)
+
+    async with session_factory() as session:
+        assert await session.scalar(select(User.coins)) == 7
+
+
+async def test_submit_restarts_dead_task(session_factory):
+    users = await create_users(session_factory, 1, coins=10)
+    batcher = WriteBatcher(session_factory, max_size=64, max_wait=0.01)
+
+    async def debit(session):
+        await session.execute(
+            text("UPDATE users SET coins = coins - 1 WHERE id = :id"),
+            dict(id=users[0].id),
+        )
+
+    await batcher.submit(debit)
+    batcher._task.cancel()
+    await asyncio.sleep(0)
+    assert batcher._task.done()
+
+    await asyncio.wait_for(batcher.submit(debit), timeout=5)
+    await batcher.stop()
+
+    async with session_factory() as session:
+        assert await session.scalar(select(User.coins)) == 8
@@ -0,0 +1,81 @@
+from prometheus_client import REGISTRY
+
+from app.api.v1.auth.credential_cache import CredentialCache
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now)
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=10)
+    # An explicit ttl can not outlive the cache-wide one
+    cache.set("c", 3, ttl=600)
+    # Nor can an entry that is already expired be stored
+    cache.set("d", 4, ttl=-1)
+
+    now += 30
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("d") is None
+
+    now += 31
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def get_lookups(result: str) -> float:
+    return REGISTRY.get_sample_value(
+        "auth_credential_cache_lookups_total", {"result": result}
+    )
+
+
+def test_credential_cache_verify():
+    cache = CredentialCache(maxsize=10, ttl=60)
+    hits, misses = get_lookups("hit") or 0, get_lookups("miss") or 0
+
+    assert not cache.verify("test_user", "Secretpassword", "hash")
+    cache.add("test_user", "Secretpassword", "hash")
+
+    assert cache.verify("test_user", "Secretpassword", "hash")
+    assert not cache.verify("test_user", "Wrongpassword", "hash")
+    assert not cache.verify("other_user", "Secretpassword", "hash")
+    assert cache.hits == 1
+    assert cache.misses == 3
+    assert get_lookups("hit") == hits + 1
+    assert get_lookups("miss") == misses + 3
+
+
+def test_credential_cache_stored_hash_changed():
+    cache = CredentialCache(maxsize=10, ttl=60)
+    cache.add("test_user", "Secretpassword", "hash")
+
+    assert not cache.verify("test_user", "Secretpassword", "new-hash")
+    # The stale entry is gone even for the old hash
+    assert not cache.verify("test_user", "Secretpassword", "hash")
@@ -0,0 +1,80 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.metrics import (
+    get_statement_label,
+    instrument_engine,
+    uninstrument_engine,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+
+def get_sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def test_statement_labels():
+    assert get_statement_label("SELECT users.id FROM users WHERE id = $1") == (
+        "SELECT users"
+    )
+    assert get_statement_label("INSERT INTO transactions (user_id) VALUES ($1)") == (
+        "INSERT transactions"
+    )
+    assert get_statement_label("\n    UPDATE users SET coins = 1") == "UPDATE users"
+    assert get_statement_label("WITH t AS (SELECT 1) SELECT * FROM items") == (
+        "WITH items"
+    )
+    assert get_statement_label("SELECT 1") == "SELECT"
+
+
+async def test_requests_are_labelled_with_route_templates(client):
+    labels = dict(method="GET", route="/api/buy/{item}", status="401")
+    before = get_sample("http_requests_total", **labels)
+
+    await client.get("/buy/cup")
+    await client.get("/buy/pen")
+
+    assert get_sample("http_requests_total", **labels) == before + 2
+    assert (
+        get_sample(
+            "http_request_duration_seconds_count", method="GET", route="/api/buy/{item}"
+        )
+        >= 2
+    )
+
+    unmatched = dict(method="GET", route="unmatched", status="404")
+    before = get_sample("http_requests_total", **unmatched)
+    await client.get("/no/such/path")
+    assert get_sample("http_requests_total", **unmatched) == before + 1
+
+    response = await client.get("http://localhost/metrics")
+    assert response.status_code == 200
+    assert 'route="/api/buy/{item}"' in response.text
+    assert "/api/buy/cup" not in response.text
+
+
+async def test_statement_metrics():
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    instrument_engine(engine)
+    before = get_sample("db_statement_duration_seconds_count", statement="SELECT")
+    errors = get_sample("db_statement_errors_total", statement="SELECT")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT 1 / 0"))
+    finally:
+        uninstrument_engine(engine)
+        await engine.dispose()
+
+    assert (
+        get_sample("db_statement_duration_seconds_count", statement="SELECT")
+        == before + 1
+    )
+    assert get_sample("db_statement_errors_total", statement="SELECT") == errors + 1
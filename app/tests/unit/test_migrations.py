@@ -0,0 +1,110 @@
+import pytest
+from datetime import date
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api.v1.store.services.partition_service import PartitionService, add_months
+from app.core.config import settings
+from app.core.db.base import Base
+from app.core.db.migrate import get_alembic_config, include_name
+
+
+def run_command(connection, name, revision):
+    config = get_alembic_config()
+    config.attributes["connection"] = connection
+    getattr(command, name)(config, revision)
+
+
+def compare_schema(connection):
+    context = MigrationContext.configure(
+        connection, opts={"include_name": include_name}
+    )
+    return compare_metadata(context, Base.metadata)
+
+
+async def reset_schema(conn):
+    await conn.run_sync(Base.metadata.drop_all)
+    await conn.execute(text("DROP TYPE IF EXISTS transactiontype"))
+    # Alembic manages its own transactions on a connection that is not
+    # already in one.
+    await conn.commit()
+
+
+async def restore_schema(engine):
+    async with engine.connect() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        # The other tests share the schema created once per session
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.commit()
+    async with AsyncSession(engine) as session:
+        await PartitionService(session).ensure_partitions(
+            date(2025, 1, 1),
+            add_months(date.today(), settings.LEDGER_PARTITIONS_AHEAD),
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_migrations_match_models():
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    try:
+        async with engine.connect() as conn:
+            await reset_schema(conn)
+
+            await conn.run_sync(run_command, "upgrade", "head")
+            assert await conn.run_sync(compare_schema) == []
+            await conn.commit()
+
+            await conn.run_sync(run_command, "downgrade", "base")
+            tables = await conn.run_sync(
+                lambda sync_conn: set(Base.metadata.tables)
+                & set(sync_conn.dialect.get_table_names(sync_conn))
+            )
+            assert tables == set()
+    finally:
+        await restore_schema(engine)
+
+
+@pytest.mark.anyio
+async def test_migrations_merge_duplicate_items():
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    try:
+        async with engine.connect() as conn:
+            await reset_schema(conn)
+            await conn.run_sync(run_command, "upgrade", "0001")
+
+            for statement in [
+                "INSERT INTO users (id, username, password, created_at, coins) "
+                "VALUES (1, 'a', '-', now(), 0), (2, 'b', '-', now(), 0)",
+                "INSERT INTO items (id, type, cost) "
+                "VALUES (1, 'cup', 20), (2, 'pen', 10), (3, 'cup', 20)",
+                "INSERT INTO inventories (id, user_id) VALUES (1, 1), (2, 2)",
+                "INSERT INTO inventory_items (inventory_id, item_id, quantity) "
+                "VALUES (1, 1, 2), (1, 3, 1), (2, 3, 4), (2, 2, 1)",
+                "INSERT INTO transactions (user_id, amount, type, timestamp, item_id) "
+                "VALUES (1, 20, 'PURCHASE', now(), 3)",
+            ]:
+                await conn.execute(text(statement))
+            await conn.commit()
+
+            await conn.run_sync(run_command, "upgrade", "0002")
+
+            result = await conn.execute(text("SELECT id, type FROM items ORDER BY id"))
+            assert result.all() == [(1, "cup"), (2, "pen")]
+            result = await conn.execute(
+                text(
+                    "SELECT inventory_id, item_id, quantity FROM inventory_items "
+                    "ORDER BY inventory_id, item_id"
+                )
+            )
+            assert result.all() == [(1, 1, 3), (2, 1, 4), (2, 2, 1)]
+            assert await conn.scalar(text("SELECT item_id FROM transactions")) == 1
+            await conn.commit()
+
+            await conn.run_sync(run_command, "downgrade", "base")
+    finally:
+        await restore_schema(engine)
@@ -0,0 +1,151 @@
+import csv
+import gzip
+import pytest
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.v1.auth.models import User
+from app.api.v1.store.models import Transaction, TransactionType
+from app.api.v1.store.services.partition_service import (
+    PartitionService,
+    add_months,
+    partition_month,
+    partition_name,
+)
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.config import settings
+from app.core.db.archive import archive_partitions
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_gifts(session, timestamps: list[datetime]) -> User:
+    sender = User(username="sender", password="-")
+    recipient = User(username="recipient", password="-")
+    session.add_all([sender, recipient])
+    await session.flush()
+    session.add_all(
+        Transaction(
+            user_id=sender.id,
+            recipient_id=recipient.id,
+            amount=1,
+            type=TransactionType.GIFT,
+            timestamp=timestamp,
+        )
+        for timestamp in timestamps
+    )
+    await session.flush()
+    return sender
+
+
+async def get_partition_of_rows(session) -> dict[str, int]:
+    result = await session.execute(
+        text(
+            "SELECT CAST(tableoid::regclass AS TEXT), count(*) "
+            "FROM transactions GROUP BY 1"
+        )
+    )
+    return dict(result.all())
+
+
+async def test_partition_names():
+    assert partition_name(date(2025, 3, 1)) == "transactions_y2025m03"
+    assert partition_month("transactions_y2025m03") == date(2025, 3, 1)
+    assert partition_month("transactions_y2025m3") is None
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+async def test_ensure_partitions(session):
+    partition_service = PartitionService(session)
+    created = await partition_service.ensure_partitions(
+        date(2031, 1, 20), date(2031, 2, 1)
+    )
+    assert created == [date(2031, 1, 1), date(2031, 2, 1)]
+    assert (
+        await partition_service.ensure_partitions(date(2031, 1, 20), date(2031, 2, 1))
+        == []
+    )
+    # The constraints that spare the validation scan are gone after attaching
+    bounds = await session.scalar(
+        text("SELECT count(*) FROM pg_constraint WHERE conname LIKE '%\\_bounds'")
+    )
+    assert bounds == 0
+
+    await create_gifts(session, [datetime(2031, 1, 15), datetime(2031, 2, 2)])
+    assert await get_partition_of_rows(session) == {
+        "transactions_y2031m01": 1,
+        "transactions_y2031m02": 1,
+    }
+
+
+async def test_time_bounded_history_prunes_partitions(session):
+    partition_service = PartitionService(session)
+    await partition_service.ensure_partitions(date(2032, 1, 1), date(2032, 4, 1))
+    sender = await create_gifts(
+        session, [datetime(2032, month, 10) for month in range(1, 5)]
+    )
+
+    transaction_service = TransactionService(session)
+    since, until = datetime(2032, 3, 1), datetime(2032, 4, 1)
+    statement = transaction_service.sent_transactions_page_query(
+        sender.id, 50, since=since, until=until
+    )
+    compiled = statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = "\n".join((await session.execute(text(f"EXPLAIN {compiled}"))).scalars())
+    assert "transactions_y2032m03" in plan
+    assert "transactions_y2032m02" not in plan
+    assert "transactions_y2032m04" not in plan
+
+    transactions, _ = await transaction_service.get_sent_transactions_page(
+        sender.id, 50, since=since, until=until
+    )
+    assert [t.timestamp for t in transactions] == [datetime(2032, 3, 10)]
+
+    # The cursor bounds the timestamp from above as well
+    statement = transaction_service.sent_transactions_page_query(
+        sender.id, 50, cursor=(datetime(2032, 2, 15), 100500)
+    )
+    compiled = statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = "\n".join((await session.execute(text(f"EXPLAIN {compiled}"))).scalars())
+    assert "transactions_y2032m02" in plan
+    assert "transactions_y2032m03" not in plan
+
+
+async def test_archive_partitions(session, tmp_path):
+    await PartitionService(session).ensure_partitions(
+        date(2001, 1, 1), date(2001, 2, 1)
+    )
+    await create_gifts(
+        session, [datetime(2001, 1, 5), datetime(2001, 1, 6), datetime(2001, 2, 7)]
+    )
+    await session.commit()
+
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    try:
+        assert await archive_partitions(
+            engine, date(2001, 2, 1), tmp_path, dry_run=True
+        ) == [tmp_path / "transactions_y2001m01.csv.gz"]
+
+        paths = await archive_partitions(engine, date(2001, 2, 1), tmp_path)
+    finally:
+        await engine.dispose()
+
+    assert paths == [tmp_path / "transactions_y2001m01.csv.gz"]
+    with gzip.open(paths[0], "rt") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["timestamp"] for row in rows] == [
+        "2001-01-05 00:00:00",
+        "2001-01-06 00:00:00",
+    ]
+
+    partition_service = PartitionService(session)
+    assert date(2001, 1, 1) not in await partition_service.get_partitions()
+    assert await partition_service.get_detached_partitions() == []
+    assert await get_partition_of_rows(session) == {"transactions_y2001m02": 1}
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.db.pool import InstrumentedPool, PoolStats
+
+
+@pytest.mark.anyio
+async def test_pool_stats():
+    stats = PoolStats()
+
+    class Pool(InstrumentedPool):
+        pass
+
+    Pool.stats = stats
+    engine = create_async_engine(
+        settings.TESTING_DB_URL,
+        poolclass=Pool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    stats.attach(engine)
+
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+
+            snapshot = stats.snapshot()
+            assert snapshot["size"] == 1
+            assert snapshot["checkedOut"] == 2
+            assert snapshot["overflow"] == 1
+
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+
+        snapshot = stats.snapshot()
+        assert snapshot["checkedOut"] == 0
+        assert snapshot["idle"] == 1
+        assert snapshot["overflow"] == 0
+        assert snapshot["connects"] == 2
+        assert snapshot["checkouts"] == snapshot["checkins"] == 2
+        assert snapshot["timeouts"] == 1
+        assert snapshot["waitCount"] == 3
+        assert snapshot["waitMaxSeconds"] >= 0.2
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_pool_stats_endpoint(client, internal_client):
+    response = await internal_client.get("/internal/pool")
+    assert response.status_code == 200
+    assert {"checkedOut", "idle", "overflow", "waitAvgSeconds"} <= set(response.json())
+
+    for headers in ({}, {"Authorization": "Bearer wrong-token"}):
+        response = await internal_client.get(
+            "/internal/pool", headers={"Authorization": ""} | headers
+        )
+        assert response.status_code == 401
+
+    response = await client.get("/internal/pool")
+    assert response.status_code == 404
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.store.models import Item
+from app.core.config import settings
+from app.core.db.populate import CATALOG, populate_db, seed_catalog
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_populate_seeds_once():
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory.begin() as session:
+        await session.execute(delete(Item))
+
+    # Without the advisory lock the workers race on the unique items.type
+    await asyncio.gather(*(populate_db(session_factory) for _ in range(4)))
+
+    async with session_factory() as session:
+        count = await session.scalar(select(func.count()).select_from(Item))
+        assert count == 10
+
+    await engine.dispose()
+
+
+async def test_seed_catalog_is_idempotent(session):
+    assert await seed_catalog(session) == 0
+
+    await session.execute(update(Item).filter_by(type="cup").values(cost=1))
+    await session.execute(delete(Item).filter_by(type="pen"))
+    assert await seed_catalog(session) == 2
+
+    items = dict((await session.execute(select(Item.type, Item.cost))).all())
+    assert items == {item.type: item.cost for item in CATALOG}
@@ -0,0 +1,93 @@
+import json
+import logging
+import pytest
+from datetime import timedelta
+from httpx import ASGITransport, AsyncClient
+
+from app.api.v1.responses import INVALID_TOKEN
+from app.core.config import settings
+from app.core.profiler import (
+    ProfilerMiddleware,
+    RequestProfile,
+    fingerprint,
+    profile_engine,
+)
+from app.main import app
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fingerprint():
+    assert fingerprint(
+        "SELECT users.id FROM users\n    WHERE users.id = $1 AND name = 'o''neil'"
+    ) == ("SELECT users.id FROM users WHERE users.id = ? AND name = ?")
+    assert fingerprint("SELECT * FROM items WHERE id IN ($1, $2, $3) LIMIT 10") == (
+        "SELECT * FROM items WHERE id IN (...) LIMIT ?"
+    )
+    assert fingerprint("SELECT * FROM transactions_y2025m03") == (
+        "SELECT * FROM transactions_y2025m03"
+    )
+
+
+async def test_n_plus_one_is_flagged(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_N_PLUS_ONE_THRESHOLD", 3)
+    profile = RequestProfile()
+    for user_id in range(3):
+        profile.record_statement(f"SELECT * FROM users WHERE id = {user_id}", 0.001, 1)
+    profile.record_statement("SELECT * FROM items", 0.002, 10)
+    profile.finish()
+
+    header = profile.get_server_timing()
+    assert 'db;dur=5.00;desc="4 queries"' in header
+    assert 'n-plus-one;desc="3x SELECT * FROM users WHERE id = ?"' in header
+
+    report = profile.to_dict()
+    assert report["nPlusOne"] == ["SELECT * FROM users WHERE id = ?"]
+    assert report["statements"][0] == {
+        "fingerprint": "SELECT * FROM users WHERE id = ?",
+        "count": 3,
+        "duration": 3.0,
+        "rows": 3,
+    }
+
+
+async def test_profiled_request(client, session, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "PROFILER_HEADER_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILER_SLOW_REQUEST", timedelta(0))
+    profile_engine(session.bind)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=ProfilerMiddleware(app)),
+        base_url="http://localhost/api",
+    ) as profiled_client:
+        response = await profiled_client.post(
+            "/auth", json={"username": "user", "password": "Secretpassword"}
+        )
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+        response = await profiled_client.get("/info", headers=headers)
+        assert "server-timing" not in response.headers
+
+        with caplog.at_level(logging.WARNING, logger="app.core.profiler"):
+            response = await profiled_client.get(
+                "/info", headers={**headers, "X-Profile": "1"}
+            )
+        assert response.status_code == 200
+        metrics = {
+            part.split(";")[0]: part
+            for part in response.headers["server-timing"].split(", ")
+        }
+        assert metrics["db"].endswith('desc="1 queries"')
+        assert {"auth", "serialize", "total"} <= metrics.keys()
+
+        report = json.loads(caplog.records[-1].getMessage())
+        assert report["event"] == "slow_request"
+        assert report["route"] == "/api/info"
+        assert report["statements"][0]["count"] == 1
+        assert report["statements"][0]["rows"] == 1
+
+        response = await profiled_client.get("/info", headers={"X-Profile": "1"})
+        assert response.status_code == 401
+        assert "server-timing" in response.headers
+        assert b"server-timing" not in dict(INVALID_TOKEN.raw_headers)
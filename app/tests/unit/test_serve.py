@@ -0,0 +1,33 @@
+import os
+import pytest
+from datetime import timedelta
+
+from app.core.config import settings
+from app.serve import get_pool_options, get_server_options
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_server_options_default_to_one_worker_per_cpu(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", None)
+    assert get_server_options()["workers"] == (os.cpu_count() or 1)
+
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 3)
+    assert get_server_options()["workers"] == 3
+
+
+async def test_pool_options_fit_connection_budget(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 80)
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD", None)
+
+    assert get_pool_options(1) == {"DB_POOL_SIZE": 20, "DB_MAX_OVERFLOW": 10}
+    assert get_pool_options(3) == {"DB_POOL_SIZE": 20, "DB_MAX_OVERFLOW": 5}
+    # 8 workers * (9 pooled + 1 listener)
+    assert get_pool_options(8) == {"DB_POOL_SIZE": 9, "DB_MAX_OVERFLOW": 0}
+    assert get_pool_options(100) == {"DB_POOL_SIZE": 1, "DB_MAX_OVERFLOW": 0}
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD", timedelta(seconds=1))
+    assert get_pool_options(8) == {"DB_POOL_SIZE": 8, "DB_MAX_OVERFLOW": 0}
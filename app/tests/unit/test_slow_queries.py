@@ -0,0 +1,95 @@
+import pytest
+from datetime import timedelta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.db.slow_queries import SlowQueryRecorder
+
+
+pytestmark = pytest.mark.anyio
+
+SLOW_SELECT = (
+    "SELECT pg_sleep(0.05), "
+    "(SELECT count(*) FROM transactions WHERE amount > :amount)"
+)
+
+
+@pytest.fixture
+async def recorded_engine(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD", timedelta(milliseconds=40))
+    recorder = SlowQueryRecorder(capacity=2)
+    engine = create_async_engine(settings.TESTING_DB_URL)
+    recorder.attach(engine)
+    yield engine, recorder
+    await recorder.stop()
+    await engine.dispose()
+
+
+async def test_slow_select_is_explained_once(recorded_engine):
+    engine, recorder = recorded_engine
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text(SLOW_SELECT), dict(amount=0))
+        await recorder.wait()
+        await conn.execute(text(SLOW_SELECT), dict(amount=5))
+        await recorder.wait()
+
+    snapshot = recorder.snapshot()
+    assert snapshot["slowStatements"] == 2
+    [plan] = snapshot["plans"]
+    assert plan["fingerprint"] == (
+        "SELECT pg_sleep(?), (SELECT count(*) FROM transactions WHERE amount > ?)"
+    )
+    assert plan["analyzed"]
+    assert "actual time" in plan["plan"]
+    assert "Execution Time" in plan["plan"]
+    assert plan["durationMs"] >= 40
+
+
+async def test_writes_are_not_analyzed(recorded_engine, session):
+    engine, recorder = recorded_engine
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "UPDATE items SET cost = cost + 1 "
+                "WHERE type = :type AND pg_sleep(0.05) IS NOT NULL"
+            ),
+            dict(type="cup"),
+        )
+    await recorder.wait()
+
+    [plan] = recorder.snapshot()["plans"]
+    assert not plan["analyzed"]
+    assert "actual time" not in plan["plan"]
+    # The statement ran once, not again for the plan
+    cost = await session.scalar(text("SELECT cost FROM items WHERE type = 'cup'"))
+    assert cost == 21
+
+
+async def test_plans_are_kept_in_a_ring_buffer(recorded_engine, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_INTERVAL", timedelta(0))
+    engine, recorder = recorded_engine
+    async with engine.connect() as conn:
+        for table in ("users", "items", "transactions"):
+            await conn.execute(
+                text(f"SELECT pg_sleep(0.05), (SELECT count(*) FROM {table})")
+            )
+            await recorder.wait()
+
+    plans = recorder.snapshot()["plans"]
+    assert len(plans) == 2
+    assert "FROM transactions" in plans[0]["statement"]
+    assert "FROM items" in plans[1]["statement"]
+    assert plans[1]["seqScans"] == ["items"]
+
+
+async def test_slow_queries_endpoint(internal_client):
+    response = await internal_client.get("/internal/slow-queries")
+    assert response.status_code == 200
+    assert response.json().keys() == {"slowStatements", "plans"}
+
+    response = await internal_client.get(
+        "/internal/slow-queries", headers={"Authorization": "Bearer wrong-token"}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,576 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1.auth.models import User
+from app.api.v1.store.models import (
+    Inventory,
+    InventoryItem,
+    Item,
+    PendingCredit,
+    Transaction,
+    TransactionType,
+)
+from app.api.v1.store.catalog import Catalog
+from app.api.v1.store.pagination import decode_cursor, encode_cursor
+from app.api.v1.store.services.credit_service import CreditService
+from app.api.v1.store.services.info_service import InfoService
+from app.api.v1.store.services.purchase_service import PurchaseResult, PurchaseService
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from app.core.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_user(session, username="test_user", coins=1000) -> User:
+    user = User(username=username, password="hashed_password", coins=coins)
+    session.add(user)
+    await session.flush()
+    await session.refresh(user)
+    return user
+
+
+async def get_item(session, type: str) -> Item:
+    result = await session.execute(select(Item).filter_by(type=type))
+    return result.scalar()
+
+
+async def test_purchase(session):
+    purchase_service = PurchaseService(session)
+    user = await create_user(session)
+    item = await get_item(session, "hoody")
+
+    result = await purchase_service.purchase(user.id, item.id)
+    assert result == PurchaseResult.OK
+
+    result = await purchase_service.purchase(user.id, item.id)
+    assert result == PurchaseResult.OK
+
+    await session.refresh(user)
+    assert user.coins == 400
+
+    result = await session.execute(
+        select(InventoryItem)
+        .join(Inventory, InventoryItem.inventory_id == Inventory.id)
+        .filter(Inventory.user_id == user.id)
+    )
+    inventory_item = result.scalar()
+    assert inventory_item.item_id == item.id
+    assert inventory_item.quantity == 2
+
+    result = await session.execute(select(Transaction).filter_by(user_id=user.id))
+    transactions = result.scalars().all()
+    assert len(transactions) == 2
+    assert all(t.type == TransactionType.PURCHASE for t in transactions)
+    assert all(t.amount == 300 for t in transactions)
+
+
+async def test_purchase_quantity(session):
+    purchase_service = PurchaseService(session)
+    user = await create_user(session)
+    item = await get_item(session, "pen")
+
+    result = await purchase_service.purchase(user.id, item.id, quantity=20)
+    assert result == PurchaseResult.OK
+
+    result = await purchase_service.purchase(user.id, item.id)
+    assert result == PurchaseResult.OK
+
+    result = await purchase_service.purchase(user.id, item.id, quantity=80)
+    assert result == PurchaseResult.INSUFFICIENT_FUNDS
+
+    await session.refresh(user)
+    assert user.coins == 790
+
+    result = await session.execute(
+        select(InventoryItem.quantity)
+        .join(Inventory, InventoryItem.inventory_id == Inventory.id)
+        .filter(Inventory.user_id == user.id, InventoryItem.item_id == item.id)
+    )
+    assert result.scalar() == 21
+
+    result = await session.execute(
+        select(Transaction.amount, Transaction.quantity)
+        .filter_by(user_id=user.id, type=TransactionType.PURCHASE)
+        .order_by(Transaction.id)
+    )
+    assert result.all() == [(200, 20), (10, 1)]
+
+
+async def test_purchase_insufficient_funds(session):
+    purchase_service = PurchaseService(session)
+    user = await create_user(session, coins=100)
+    item = await get_item(session, "hoody")
+
+    result = await purchase_service.purchase(user.id, item.id)
+    assert result == PurchaseResult.INSUFFICIENT_FUNDS
+
+    await session.refresh(user)
+    assert user.coins == 100
+
+    result = await session.execute(select(Inventory).filter_by(user_id=user.id))
+    assert not result.scalar()
+
+    result = await session.execute(select(Transaction).filter_by(user_id=user.id))
+    assert not result.scalar()
+
+
+async def test_purchase_unknown_item(session):
+    purchase_service = PurchaseService(session)
+    user = await create_user(session)
+
+    result = await purchase_service.purchase(user.id, 100500)
+    assert result == PurchaseResult.UNKNOWN_ITEM
+
+
+async def test_purchase_unknown_user(session):
+    purchase_service = PurchaseService(session)
+    item = await get_item(session, "pen")
+
+    result = await purchase_service.purchase(100500, item.id)
+    assert result == PurchaseResult.UNKNOWN_USER
+
+
+async def test_transfer(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender")
+    recipient = await create_user(session, "recipient")
+
+    result = await transfer_service.transfer(sender.id, "recipient", 300)
+    assert result == TransferResult.OK
+
+    await session.refresh(sender)
+    await session.refresh(recipient)
+    assert sender.coins == 700
+    assert recipient.coins == 1300
+
+    result = await session.execute(select(Transaction).filter_by(user_id=sender.id))
+    transaction = result.scalar()
+    assert transaction.type == TransactionType.GIFT
+    assert transaction.recipient_id == recipient.id
+    assert transaction.amount == 300
+
+
+async def test_transfer_to_self(session):
+    transfer_service = TransferService(session)
+    user = await create_user(session)
+
+    result = await transfer_service.transfer(user.id, user.username, 300)
+    assert result == TransferResult.OK
+
+    await session.refresh(user)
+    assert user.coins == 1000
+
+
+async def test_transfer_insufficient_funds(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender", coins=100)
+    recipient = await create_user(session, "recipient")
+
+    result = await transfer_service.transfer(sender.id, "recipient", 300)
+    assert result == TransferResult.INSUFFICIENT_FUNDS
+
+    await session.refresh(sender)
+    await session.refresh(recipient)
+    assert sender.coins == 100
+    assert recipient.coins == 1000
+
+    result = await session.execute(select(Transaction).filter_by(user_id=sender.id))
+    assert not result.scalar()
+
+
+async def test_transfer_unknown_recipient_or_sender(session):
+    transfer_service = TransferService(session)
+    user = await create_user(session)
+
+    result = await transfer_service.transfer(user.id, "non-existant-recipient", 300)
+    assert result == TransferResult.RECIPIENT_NOT_FOUND
+
+    result = await transfer_service.transfer(100500, user.username, 300)
+    assert result == TransferResult.UNKNOWN_SENDER
+
+
+async def test_transfer_batch(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender")
+    first = await create_user(session, "first")
+    second = await create_user(session, "second")
+
+    result = await transfer_service.transfer_batch(
+        sender.id, [("second", 100), ("first", 200), ("second", 50), ("sender", 10)]
+    )
+    assert result == TransferResult.OK
+
+    for user in (sender, first, second):
+        await session.refresh(user)
+    assert (sender.coins, first.coins, second.coins) == (650, 1200, 1150)
+
+    result = await session.execute(
+        select(Transaction.recipient_id, Transaction.amount)
+        .filter_by(user_id=sender.id, type=TransactionType.GIFT)
+        .order_by(Transaction.id)
+    )
+    assert result.all() == [
+        (second.id, 100),
+        (first.id, 200),
+        (second.id, 50),
+        (sender.id, 10),
+    ]
+
+
+async def test_transfer_batch_is_all_or_nothing(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender", coins=500)
+    recipient = await create_user(session, "recipient")
+
+    for deferred in (False, True):
+        for gifts, expected in (
+            (
+                [("recipient", 300), ("unknown", 100)],
+                TransferResult.RECIPIENT_NOT_FOUND,
+            ),
+            (
+                [("recipient", 300), ("recipient", 300)],
+                TransferResult.INSUFFICIENT_FUNDS,
+            ),
+            ([("unknown", 300), ("recipient", 300)], TransferResult.INSUFFICIENT_FUNDS),
+        ):
+            result = await transfer_service.transfer_batch(sender.id, gifts, deferred)
+            assert result == expected
+
+        result = await transfer_service.transfer_batch(
+            100500, [("recipient", 1)], deferred
+        )
+        assert result == TransferResult.UNKNOWN_SENDER
+
+    await session.refresh(sender)
+    await session.refresh(recipient)
+    assert (sender.coins, recipient.coins) == (500, 1000)
+    assert await CreditService(session).get_pending_total(recipient.id) == 0
+
+    result = await session.execute(select(Transaction).filter_by(user_id=sender.id))
+    assert not result.scalar()
+
+
+async def test_deferred_transfer_batch(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender")
+    first = await create_user(session, "first")
+    second = await create_user(session, "second")
+
+    result = await transfer_service.transfer_batch(
+        sender.id, [("second", 100), ("first", 200), ("second", 50)], deferred=True
+    )
+    assert result == TransferResult.OK
+
+    await session.refresh(sender)
+    assert sender.coins == 650
+    credit_service = CreditService(session)
+    assert await credit_service.get_pending_total(first.id) == 200
+    assert await credit_service.get_pending_total(second.id) == 150
+
+    count = await session.scalar(
+        select(func.count()).select_from(Transaction).filter_by(user_id=sender.id)
+    )
+    assert count == 3
+
+
+async def test_transfer_concurrent_mutual_gifts():
+    engine = create_async_engine(url=settings.TESTING_DB_URL)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with async_session() as session:
+        first = await create_user(session, "first")
+        second = await create_user(session, "second")
+        await session.commit()
+
+    async def transfer(sender: User, recipient: User):
+        async with async_session() as session:
+            transfer_service = TransferService(session)
+            result = await transfer_service.transfer(sender.id, recipient.username, 1)
+            await session.commit()
+            return result
+
+    # Without ordered locking these would deadlock within the first few pairs
+    results = await asyncio.gather(
+        *(transfer(first, second) for _ in range(30)),
+        *(transfer(second, first) for _ in range(20)),
+    )
+    assert all(result == TransferResult.OK for result in results)
+
+    async with async_session() as session:
+        first = await session.get(User, first.id)
+        second = await session.get(User, second.id)
+    await engine.dispose()
+
+    assert first.coins == 990
+    assert second.coins == 1010
+
+
+async def test_deferred_transfer(session):
+    transfer_service = TransferService(session)
+    sender = await create_user(session, "sender")
+    recipient = await create_user(session, "recipient")
+
+    result = await transfer_service.transfer(sender.id, "recipient", 300, deferred=True)
+    assert result == TransferResult.OK
+
+    await session.refresh(sender)
+    await session.refresh(recipient)
+    assert sender.coins == 700
+    # Credited later, but already part of the reported balance
+    assert recipient.coins == 1000
+    assert await CreditService(session).get_pending_total(recipient.id) == 300
+    assert await CreditService(session).get_balance(recipient.id) == 1300
+    assert await CreditService(session).get_balance(100500) is None
+    assert (await InfoService(session).get_info(recipient.id)).coins == 1300
+
+    result = await session.execute(select(Transaction).filter_by(user_id=sender.id))
+    transaction = result.scalar()
+    assert transaction.recipient_id == recipient.id
+    assert transaction.amount == 300
+
+    # The recipient's own debit folds the credit first
+    result = await transfer_service.transfer(
+        recipient.id, "sender", 1300, deferred=True
+    )
+    assert result == TransferResult.OK
+    await session.refresh(recipient)
+    assert recipient.coins == 0
+    assert await CreditService(session).get_pending_total(recipient.id) == 0
+
+    item = await get_item(session, "pink-hoody")
+    result = await PurchaseService(session).purchase(
+        sender.id, item.id, fold_credits=True
+    )
+    assert result == PurchaseResult.OK
+    await session.refresh(sender)
+    assert sender.coins == 1500
+
+
+async def test_deferred_transfer_errors(session):
+    transfer_service = TransferService(session)
+    user = await create_user(session, coins=100)
+
+    for sender_id, recipient, amount, expected in (
+        (user.id, "non-existant-recipient", 50, TransferResult.RECIPIENT_NOT_FOUND),
+        (user.id, "non-existant-recipient", 500, TransferResult.INSUFFICIENT_FUNDS),
+        (user.id, user.username, 500, TransferResult.INSUFFICIENT_FUNDS),
+        (100500, user.username, 50, TransferResult.UNKNOWN_SENDER),
+    ):
+        result = await transfer_service.transfer(
+            sender_id, recipient, amount, deferred=True
+        )
+        assert result == expected
+
+    await session.refresh(user)
+    assert user.coins == 100
+    assert await CreditService(session).get_pending_total(user.id) == 0
+
+
+async def test_deferred_transfers_to_one_recipient():
+    engine = create_async_engine(url=settings.TESTING_DB_URL)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with async_session() as session:
+        senders = [await create_user(session, f"sender_{i}") for i in range(20)]
+        recipient = await create_user(session, "popular")
+        await session.commit()
+
+    async def transfer(sender: User):
+        async with async_session() as session:
+            result = await TransferService(session).transfer(
+                sender.id, recipient.username, 10, deferred=True
+            )
+            await session.commit()
+            return result
+
+    async def spend():
+        async with async_session() as session:
+            result = await TransferService(session).transfer(
+                recipient.id, senders[0].username, 1, deferred=True
+            )
+            await session.commit()
+            return result
+
+    async def compact():
+        async with async_session() as session:
+            folded = await CreditService(session).compact(limit=5)
+            await session.commit()
+            return folded
+
+    results = await asyncio.gather(
+        *(transfer(sender) for sender in senders for _ in range(5)),
+        *(spend() for _ in range(10)),
+        *(compact() for _ in range(5)),
+    )
+    assert all(result == TransferResult.OK for result in results[:110])
+
+    async with async_session() as session:
+        while await CreditService(session).compact(limit=5):
+            pass
+        await session.commit()
+        assert await CreditService(session).get_pending_total(recipient.id) == 0
+        recipient = await session.get(User, recipient.id)
+        total = await session.scalar(select(func.sum(User.coins)))
+    await engine.dispose()
+
+    assert recipient.coins == 1000 + 20 * 5 * 10 - 10
+    assert total == 21 * 1000
+
+
+async def test_compaction_alongside_direct_transfers():
+    engine = create_async_engine(url=settings.TESTING_DB_URL)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with async_session() as session:
+        first = await create_user(session, "first")
+        second = await create_user(session, "second")
+        await session.commit()
+
+    async def credit():
+        async with async_session() as session:
+            session.add_all(
+                PendingCredit(user_id=user.id, amount=1) for user in (second, first)
+            )
+            await session.commit()
+
+    async def transfer(sender: User, recipient: User):
+        async with async_session() as session:
+            result = await TransferService(session).transfer(
+                sender.id, recipient.username, 1
+            )
+            await session.commit()
+            return result
+
+    async def compact():
+        async with async_session() as session:
+            folded = await CreditService(session).compact(limit=100)
+            await session.commit()
+            return folded
+
+    # Transfers and compaction lock both users in the same order
+    for _ in range(10):
+        await credit()
+        results = await asyncio.gather(
+            *(transfer(first, second) for _ in range(5)),
+            *(transfer(second, first) for _ in range(5)),
+            compact(),
+        )
+        assert all(result == TransferResult.OK for result in results[:10])
+
+    async with async_session() as session:
+        while await CreditService(session).compact(limit=100):
+            pass
+        await session.commit()
+        total = await session.scalar(select(func.sum(User.coins)))
+    await engine.dispose()
+
+    assert total == 2 * 1000 + 2 * 10
+
+
+async def test_info_single_statement_and_concurrent():
+    engine = create_async_engine(url=settings.TESTING_DB_URL)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with async_session() as session:
+        user = await create_user(session, "user")
+        await create_user(session, "friend")
+        item = await get_item(session, "cup")
+        await PurchaseService(session).purchase(user.id, item.id)
+        await PurchaseService(session).purchase(user.id, item.id)
+        await TransferService(session).transfer(user.id, "friend", 100)
+        await session.commit()
+
+    async with async_session() as session:
+        info_service = InfoService(session)
+        info = await info_service.get_info(user.id)
+        info_concurrent = await info_service.get_info_concurrently(
+            async_session, user.id
+        )
+        aggregated = await info_service.get_info(user.id, aggregated=True)
+        aggregated_concurrent = await info_service.get_info_concurrently(
+            async_session, user.id, aggregated=True
+        )
+        info_json = await info_service.get_info_json(user.id)
+        aggregated_json = await info_service.get_info_json(user.id, aggregated=True)
+        missing = await info_service.get_info(100500)
+        missing_json = await info_service.get_info_json(100500)
+        missing_concurrent = await info_service.get_info_concurrently(
+            async_session, 100500
+        )
+    await engine.dispose()
+
+    assert info.coins == 860
+    assert [item.type for item in info.inventory] == ["cup", "cup"]
+    assert info.coinHistory.sent[0].toUser == "friend"
+    assert info == info_concurrent
+    assert [(i.type, i.quantity) for i in aggregated.inventory] == [("cup", 2)]
+    assert aggregated.coinHistory == info.coinHistory
+    assert aggregated == aggregated_concurrent
+    assert json.loads(info_json) == info.model_dump()
+    assert json.loads(aggregated_json) == aggregated.model_dump()
+    assert missing is None
+    assert missing_concurrent is None
+    assert missing_json is None
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2025, 1, 2, 3, 4, 5, 678)
+
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+# Partitions name their copies of the indexes after the indexed columns
+@pytest.mark.parametrize(
+    "query, index",
+    [
+        ("sent_transactions_page_query", "_user_id_type_timestamp_id_"),
+        ("received_transactions_page_query", "_recipient_id_timestamp_id_"),
+    ],
+)
+async def test_history_page_queries_use_indexes(session, query, index):
+    transaction_service = TransactionService(session)
+    user = await create_user(session)
+
+    # The test table is tiny, so sequential scans have to be discouraged for
+    # the planner to show what it would do on a large one.
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    for cursor in (None, (datetime.now(), 100500)):
+        statement = getattr(transaction_service, query)(user.id, 50, cursor)
+        compiled = statement.compile(
+            dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+        result = await session.execute(text(f"EXPLAIN {compiled}"))
+        plan = "\n".join(result.scalars())
+
+        assert index in plan
+
+
+async def test_catalog_keeps_notification_refreshes(monkeypatch):
+    catalog = Catalog()
+    refreshed = asyncio.Event()
+    release = asyncio.Event()
+
+    async def refresh():
+        refreshed.set()
+        await release.wait()
+
+    monkeypatch.setattr(catalog, "refresh", refresh)
+    catalog._on_notification(None, 0, settings.CATALOG_CHANNEL, "2")
+    await refreshed.wait()
+    # The refresh task is referenced until it finishes
+    assert len(catalog._notification_tasks) == 1
+
+    release.set()
+    await asyncio.gather(*catalog._notification_tasks)
+    assert not catalog._notification_tasks
@@ -0,0 +1,87 @@
+"""Event-loop lag and /api/info latency while /api/auth is under load.
+
+Usage: python -m benchmarks.auth_event_loop_lag [--logins 32] [--duration 5]
+
+Runs the same load once per hashing executor mode so the inline (blocking)
+behaviour can be compared against the thread and process pools.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.api.v1.auth.security import shutdown_hashing_executor
+from .common import app_client, get_token, random_username, summarize
+
+
+PASSWORD = "Secretpassword"
+
+
+async def monitor_lag(stop: asyncio.Event, samples: list[float], interval=0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def login_loop(client, username: str, stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        await client.post("/auth", json={"username": username, "password": PASSWORD})
+        counter[0] += 1
+
+
+async def info_loop(client, token: str, stop: asyncio.Event, samples: list[float]):
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/info", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+
+
+async def run_mode(mode: str, logins: int, duration: float) -> dict:
+    settings.HASHING_EXECUTOR = mode
+
+    async with app_client() as client:
+        username = random_username()
+        token = await get_token(client, username, PASSWORD)
+
+        stop = asyncio.Event()
+        lag, info_latency, login_count = [], [], [0]
+        tasks = [
+            asyncio.create_task(monitor_lag(stop, lag)),
+            asyncio.create_task(info_loop(client, token, stop, info_latency)),
+            *(
+                asyncio.create_task(login_loop(client, username, stop, login_count))
+                for _ in range(logins)
+            ),
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    shutdown_hashing_executor()
+
+    return {
+        "mode": mode,
+        "logins_per_sec": round(login_count[0] / duration, 1),
+        "event_loop_lag": summarize(lag),
+        "info_latency": summarize(info_latency),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    results = [await run_mode(mode, args.logins, args.duration) for mode in args.modes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""N gifts as N /api/sendCoin calls vs one /api/sendCoin/batch call.
+
+Usage: python -m benchmarks.batch_gifting [--sizes 1 10 50 100] [--rounds 20]
+
+The sender gifts N distinct recipients, once with a request per gift and once
+with a single batch. The two variants alternate in every round so that drift
+affects both alike; the latencies are those of the whole set of N gifts.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from sqlalchemy import update
+
+from app.api.v1.auth.models import User
+from app.core.db.engine import async_session, engine
+from .common import app_client, get_token, random_username, summarize
+
+
+async def create_recipients(count: int) -> list[str]:
+    async with async_session() as session:
+        users = [
+            User(
+                username=random_username(),
+                password="-",
+                created_at=datetime.now(),
+                coins=1000,
+            )
+            for _ in range(count)
+        ]
+        session.add_all(users)
+        await session.commit()
+    return [user.username for user in users]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    async with app_client() as client:
+        sender = random_username()
+        token = await get_token(client, sender, "Benchmarkpassword")
+        headers = {"Authorization": f"Bearer {token}"}
+        async with async_session() as session:
+            await session.execute(
+                update(User).where(User.username == sender).values(coins=10**9)
+            )
+            await session.commit()
+
+        recipients = await create_recipients(max(args.sizes))
+
+        for size in args.sizes:
+            gifts = [
+                {"toUser": username, "amount": 1} for username in recipients[:size]
+            ]
+            individual, batch = [], []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                for gift in gifts:
+                    response = await client.post(
+                        "/sendCoin", json=gift, headers=headers
+                    )
+                    response.raise_for_status()
+                individual.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                response = await client.post(
+                    "/sendCoin/batch", json=gifts, headers=headers
+                )
+                response.raise_for_status()
+                batch.append(time.perf_counter() - started)
+
+            results.append(
+                {
+                    "gifts": size,
+                    "individual": summarize(individual),
+                    "batch": summarize(batch),
+                    "speedup_p50": round(
+                        sorted(individual)[len(individual) // 2]
+                        / sorted(batch)[len(batch) // 2],
+                        1,
+                    ),
+                }
+            )
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
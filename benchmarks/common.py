@@ -0,0 +1,48 @@
+import math
+import uuid
+from contextlib import asynccontextmanager
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+
+    ordered = sorted(values)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values, default=float("nan")) * 1000, 2),
+    }
+
+
+def random_username(prefix: str = "bench") -> str:
+    return f"{prefix}_{uuid.uuid4()}"
+
+
+# Runs the application in-process against the database from settings,
+# including its lifespan (schema and catalog seeding).
+@asynccontextmanager
+async def app_client():
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://localhost/api"
+        ) as client:
+            yield client
+
+
+async def get_token(client: AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        "/auth", json={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["token"]
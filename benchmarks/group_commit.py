@@ -0,0 +1,98 @@
+"""Gift traffic with one commit per transfer vs the group-commit WriteBatcher.
+
+Usage: python -m benchmarks.group_commit [--users 100] [--concurrency 64]
+                                         [--transfers 4000] [--max-size 64]
+                                         [--max-wait-ms 2]
+
+Reports transfers/sec next to commits/sec: without batching every transfer is
+its own commit, with batching a commit covers a whole batch.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+
+from app.api.v1.auth.models import User
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from app.core.db.batching import WriteBatcher
+from app.core.db.engine import async_session, engine
+from .common import random_username, summarize
+
+
+async def run(name: str, users: list[User], args, batcher: WriteBatcher | None):
+    latencies, commits = [], 0
+    remaining = iter(range(args.transfers))
+
+    async def transfer(session, sender: User, recipient: User):
+        return await TransferService(session).transfer(sender.id, recipient.username, 1)
+
+    async def worker():
+        nonlocal commits
+        for _ in remaining:
+            sender, recipient = random.sample(users, 2)
+            started = time.perf_counter()
+            if batcher is None:
+                async with async_session() as session:
+                    result = await transfer(session, sender, recipient)
+                    await session.commit()
+                commits += 1
+            else:
+                result = await batcher.submit(
+                    lambda session: transfer(session, sender, recipient)
+                )
+            assert result == TransferResult.OK
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    if batcher is not None:
+        await batcher.stop()
+        commits = batcher.batches
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": name,
+        "transfers_per_sec": round(args.transfers / elapsed, 1),
+        "commits_per_sec": round(commits / elapsed, 1),
+        "transfers_per_commit": round(args.transfers / commits, 1),
+        "latency": summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--transfers", type=int, default=4000)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    async with async_session() as session:
+        users = [
+            User(
+                username=random_username(),
+                password="-",
+                created_at=datetime.now(),
+                coins=10**6,
+            )
+            for _ in range(args.users)
+        ]
+        session.add_all(users)
+        await session.commit()
+
+    batcher = WriteBatcher(async_session, args.max_size, args.max_wait_ms / 1000)
+    results = [
+        await run("commit_per_transfer", users, args, None),
+        await run("group_commit", users, args, batcher),
+    ]
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""Keyset-paginated history vs loading the whole history, on a large ledger.
+
+Usage: python -m benchmarks.history_pagination [--rows 2000000] [--users 1000]
+
+Seeds --rows gift transactions spread across --users users (skipped when
+--rows is 0), makes sure the history indexes exist and measures, for one
+user: loading the full sent history, the first page and a page 20 pages
+deep. The EXPLAIN ANALYZE of the first page is printed as well.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from sqlalchemy import text
+
+from app.api.v1.store.models import Transaction
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.db.engine import engine, read_only_async_session
+from .common import summarize
+
+
+async def seed(rows: int, users: int) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: [
+                index.create(sync_conn, checkfirst=True)
+                for index in Transaction.__table__.indexes
+            ]
+        )
+        first_id = (
+            (
+                await conn.execute(
+                    text(
+                        """
+                    INSERT INTO users (username, password, created_at, coins)
+                    SELECT 'history_' || md5(random()::text), '-', now(), 1000
+                    FROM generate_series(1, :users)
+                    RETURNING id
+                    """
+                    ),
+                    dict(users=users),
+                )
+            )
+            .scalars()
+            .all()[0]
+        )
+        if rows:
+            await conn.execute(
+                text(
+                    """
+                    INSERT INTO transactions
+                        (user_id, amount, type, timestamp, recipient_id)
+                    SELECT
+                        :first_id + n % :users,
+                        1 + n % 100,
+                        'GIFT',
+                        CAST(:now AS TIMESTAMP) - n * interval '1 second',
+                        :first_id + (n + 1) % :users
+                    FROM generate_series(1, :rows) AS n
+                    """
+                ),
+                dict(first_id=first_id, users=users, rows=rows, now=datetime.now()),
+            )
+        await conn.execute(text("ANALYZE transactions"))
+    return first_id
+
+
+async def timed(query, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await query()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    user_id = await seed(args.rows, args.users)
+
+    async with read_only_async_session() as session:
+        transaction_service = TransactionService(session)
+
+        async def full_history():
+            await transaction_service.get_sent_transactions(user_id)
+
+        async def first_page():
+            await transaction_service.get_sent_transactions_page(user_id, args.limit)
+
+        cursor = None
+        for _ in range(20):
+            _, cursor = await transaction_service.get_sent_transactions_page(
+                user_id, args.limit, cursor
+            )
+
+        async def deep_page():
+            await transaction_service.get_sent_transactions_page(
+                user_id, args.limit, cursor
+            )
+
+        results = {
+            name: await timed(query, args.repeat)
+            for name, query in (
+                ("full_history", full_history),
+                ("first_page", first_page),
+                ("page_20", deep_page),
+            )
+        }
+
+        compiled = transaction_service.sent_transactions_page_query(
+            user_id, args.limit
+        ).compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        plan = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}"))
+        results["first_page_plan"] = plan.scalars().all()
+
+    await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
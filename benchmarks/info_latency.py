@@ -0,0 +1,129 @@
+"""Latency of building /api/info for users with 10, 1k and 100k transactions.
+
+Usage: python -m benchmarks.info_latency [--sizes 10 1000 100000] [--repeat 20]
+
+Modes:
+    sequential  the four queries one after another on one session
+    single      one JSON-aggregating statement (InfoService.get_info)
+    concurrent  the four queries on separate connections at once
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from sqlalchemy import text
+
+from app.api.v1.auth.services.user_service import UserService
+from app.api.v1.store.schemas import CoinHistory, InfoResponse
+from app.api.v1.store.services.info_service import InfoService
+from app.api.v1.store.services.inventory_service import InventoryService
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.db.engine import engine, read_only_async_session
+from .common import random_username, summarize
+
+
+async def sequential(user_id: int) -> InfoResponse:
+    async with read_only_async_session() as session:
+        user = await UserService(session).get_user_by_id(user_id)
+        items = await InventoryService(session).get_user_inventory_items(user_id)
+        transaction_service = TransactionService(session)
+        sent = await transaction_service.get_sent_transactions(user_id)
+        received = await transaction_service.get_received_transactions(user_id)
+        return InfoResponse(
+            coins=user.coins,
+            inventory=items,
+            coinHistory=CoinHistory(received=received, sent=sent),
+        )
+
+
+async def single(user_id: int) -> InfoResponse:
+    async with read_only_async_session() as session:
+        return await InfoService(session).get_info(user_id)
+
+
+async def concurrent(user_id: int) -> InfoResponse:
+    return await InfoService.get_info_concurrently(read_only_async_session, user_id)
+
+
+async def seed_user(transactions: int) -> int:
+    async with engine.begin() as conn:
+        user_id, peer_id = [
+            (
+                await conn.execute(
+                    text(
+                        "INSERT INTO users (username, password, created_at, coins) "
+                        "VALUES (:username, '-', :now, 1000) RETURNING id"
+                    ),
+                    dict(username=random_username(), now=datetime.now()),
+                )
+            ).scalar()
+            for _ in range(2)
+        ]
+        # Half of the history is sent by the user, half is received
+        await conn.execute(
+            text(
+                """
+                INSERT INTO transactions
+                    (user_id, amount, type, timestamp, recipient_id)
+                SELECT
+                    CASE WHEN n % 2 = 0 THEN u.id ELSE u.peer_id END,
+                    1 + n % 100,
+                    'GIFT',
+                    CAST(:now AS TIMESTAMP),
+                    CASE WHEN n % 2 = 0 THEN u.peer_id ELSE u.id END
+                FROM (
+                    SELECT CAST(:user_id AS INTEGER) AS id,
+                        CAST(:peer_id AS INTEGER) AS peer_id
+                ) AS u
+                CROSS JOIN generate_series(1, :transactions) AS n
+                """
+            ),
+            dict(
+                user_id=user_id,
+                peer_id=peer_id,
+                transactions=transactions,
+                now=datetime.now(),
+            ),
+        )
+        await conn.execute(text("ANALYZE transactions"))
+    return user_id
+
+
+async def measure(mode, user_id: int, repeat: int) -> dict:
+    await mode(user_id)
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await mode(user_id)
+        latencies.append(time.perf_counter() - started)
+
+    return summarize(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        user_id = await seed_user(size)
+        for mode in (sequential, single, concurrent):
+            results.append(
+                {
+                    "transactions": size,
+                    "mode": mode.__name__,
+                    "latency": await measure(mode, user_id, args.repeat),
+                }
+            )
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
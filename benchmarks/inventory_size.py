@@ -0,0 +1,89 @@
+"""/api/info latency, body size and memory for large inventories.
+
+Usage: python -m benchmarks.inventory_size [--sizes 10 1000 10000 100000]
+
+Compares the expanded inventory shape (one entry per unit owned) with
+?inventory=aggregated (one entry per item type) through the full
+in-process application, including serialization.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from sqlalchemy import text
+
+from app.api.v1.auth.security import get_sub_from_token
+from app.core.db.engine import engine
+from .common import app_client, get_token, random_username, summarize
+
+
+async def give_items(user_id: int, quantity: int):
+    async with engine.begin() as conn:
+        inventory_id = (
+            await conn.execute(
+                text(
+                    "INSERT INTO inventories (user_id) VALUES (:user_id) RETURNING id"
+                ),
+                dict(user_id=user_id),
+            )
+        ).scalar()
+        # Most of the units are pens, plus one of every other item
+        await conn.execute(
+            text(
+                """
+                INSERT INTO inventory_items (inventory_id, item_id, quantity)
+                SELECT :inventory_id, id,
+                    CASE WHEN type = 'pen' THEN :quantity ELSE 1 END
+                FROM items
+                """
+            ),
+            dict(inventory_id=inventory_id, quantity=quantity),
+        )
+
+
+async def measure(client, headers: dict, params: dict, repeat: int) -> dict:
+    latencies = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get("/info", headers=headers, params=params)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "body_bytes": len(response.content),
+        "peak_memory_kb": round(peak / 1024),
+        "latency": summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 1000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = []
+    async with app_client() as client:
+        for size in args.sizes:
+            token = await get_token(client, random_username(), "Secretpassword")
+            await give_items(int(get_sub_from_token(token)), size)
+            headers = {"Authorization": f"Bearer {token}"}
+
+            for inventory in ("expanded", "aggregated"):
+                result = await measure(
+                    client, headers, {"inventory": inventory}, args.repeat
+                )
+                results.append({"units": size, "inventory": inventory, **result})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
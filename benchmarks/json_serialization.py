@@ -0,0 +1,117 @@
+"""Cost of rendering /api/info responses and error responses.
+
+Usage: python -m benchmarks.json_serialization [--number 2000]
+
+For an info response with N coin history entries each way, measures:
+    fastapi_default   what a route annotated with the model does (validation,
+                      serialization and JSONResponse)
+    orjson            ORJSONResponse from the model dumped to Python objects
+    model_dump_json   pydantic's own serializer (the concurrent /info mode)
+    passthrough       the body rendered by PostgreSQL, wrapped in a Response
+and for the "Invalid token" error, building a JSONResponse per request against
+returning the prerendered one.
+"""
+
+import argparse
+import json
+import timeit
+from fastapi import Response, status
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.v1.responses import INVALID_TOKEN
+from app.api.v1.schemas import ErrorResponse
+from app.api.v1.store.schemas import (
+    CoinHistory,
+    InfoResponse,
+    Item,
+    TransactionFromUser,
+    TransactionToUser,
+)
+
+
+def build_info(entries: int) -> InfoResponse:
+    return InfoResponse(
+        coins=1000,
+        inventory=[Item(type="t-shirt", cost=80) for _ in range(entries)],
+        coinHistory=CoinHistory(
+            received=[
+                TransactionFromUser(fromUser=f"user_{i}", amount=i)
+                for i in range(entries)
+            ],
+            sent=[
+                TransactionToUser(toUser=f"user_{i}", amount=i) for i in range(entries)
+            ],
+        ),
+    )
+
+
+# serialize_response never suspends for coroutine endpoints, so its coroutine
+# completes on the first send.
+def run_sync(coroutine):
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def measure(render, number: int) -> float:
+    return round(timeit.timeit(render, number=number) / number * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    field = create_model_field(
+        name="Response", type_=InfoResponse, mode="serialization"
+    )
+
+    results = {}
+    for entries in (0, 10, 100, 1000):
+        info = build_info(entries)
+        body = json.dumps(info.model_dump())
+        renderers = {
+            "fastapi_default": lambda: JSONResponse(
+                run_sync(
+                    serialize_response(
+                        field=field, response_content=info, is_coroutine=True
+                    )
+                )
+            ),
+            "orjson": lambda: ORJSONResponse(info.model_dump(mode="json")),
+            "model_dump_json": lambda: Response(
+                info.model_dump_json(), media_type="application/json"
+            ),
+            "passthrough": lambda: Response(
+                body.encode(), media_type="application/json"
+            ),
+        }
+        results[f"{entries}_entries"] = {
+            "bytes": len(info.model_dump_json()),
+            **{
+                f"{name}_us": measure(render, args.number)
+                for name, render in renderers.items()
+            },
+        }
+
+    number = args.number * 10
+    results["error"] = {
+        "per_request_us": measure(
+            lambda: JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content=ErrorResponse(errors="Invalid token").model_dump(),
+            ),
+            number,
+        ),
+        "prerendered_us": measure(lambda: INVALID_TOKEN, number),
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
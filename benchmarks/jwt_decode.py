@@ -0,0 +1,35 @@
+"""Cost of get_sub_from_token with and without the decoded-claims cache.
+
+Usage: python -m benchmarks.jwt_decode [--number 100000]
+"""
+
+import argparse
+import json
+import timeit
+
+from app.api.v1.auth.security import create_jwt, get_sub_from_token, token_cache
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    token = create_jwt({"sub": "1"})
+    token_cache.clear()
+
+    results = {}
+    for name, use_cache in (("uncached", False), ("cached", True)):
+        seconds = timeit.timeit(
+            lambda: get_sub_from_token(token, use_cache), number=args.number
+        )
+        results[name] = {"us_per_call": round(seconds / args.number * 1e6, 3)}
+
+    results["speedup"] = round(
+        results["uncached"]["us_per_call"] / results["cached"]["us_per_call"], 1
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Load tests of the HTTP API with reproducible scenarios.
+
+Usage: python -m benchmarks.loadtest SCENARIO [--target URL] [--concurrency 32]
+                                     [--requests 5000] [--users 200]
+                                     [--random-seed 1] [--output FILE]
+
+Scenarios:
+    login   a storm of /api/auth logins of existing users
+    buy     buy-heavy traffic: /api/buy/{item}, some /api/info and /api/items
+    gifts   /api/sendCoin where most gifts go to a few hot recipients
+    info    /api/info of the users with large coin histories
+
+Users are seeded with benchmarks.seeder into the database from settings before
+every run. Without --target the application runs in-process (ASGITransport,
+lifespan included); with it requests go to a server using that database, e.g.
+--target http://localhost:8080. Workers draw their requests from generators
+seeded with --random-seed, so runs of a scenario are comparable.
+
+The result is printed as JSON (and written to FILE) with the git revision,
+RPS, latency percentiles and the error rate per operation, for comparison
+across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from httpx import AsyncClient, HTTPError, Limits
+
+from app.core.db.engine import engine
+from app.core.db.populate import CATALOG
+from .common import app_client, get_token, summarize
+from .seeder import PASSWORD, seed
+
+
+class Context:
+    def __init__(self, usernames: list[str], tokens: list[str], args):
+        self.usernames = usernames
+        self.tokens = tokens
+        self.history_tokens = tokens[: args.history_users]
+        self.hot_recipients = usernames[: args.hot_recipients]
+        self.hot_share = args.hot_share
+
+
+def auth_headers(token: str) -> dict:
+    return {"headers": {"Authorization": f"Bearer {token}"}}
+
+
+# A scenario returns the next request as (operation, method, url, options).
+
+
+def login_scenario(rng: random.Random, context: Context):
+    username = rng.choice(context.usernames)
+    return (
+        "auth",
+        "POST",
+        "/auth",
+        {"json": {"username": username, "password": PASSWORD}},
+    )
+
+
+def buy_scenario(rng: random.Random, context: Context):
+    token, roll = rng.choice(context.tokens), rng.random()
+    if roll < 0.8:
+        item = rng.choice(CATALOG).type
+        return "buy", "GET", f"/buy/{item}", auth_headers(token)
+    if roll < 0.9:
+        return "info", "GET", "/info", auth_headers(token)
+    return "items", "GET", "/items", {}
+
+
+def gifts_scenario(rng: random.Random, context: Context):
+    sender = rng.randrange(len(context.tokens))
+    if rng.random() < context.hot_share:
+        recipient = rng.choice(context.hot_recipients)
+    else:
+        recipient = rng.choice(context.usernames)
+    if recipient == context.usernames[sender]:
+        recipient = context.usernames[(sender + 1) % len(context.usernames)]
+
+    return (
+        "sendCoin",
+        "POST",
+        "/sendCoin",
+        {
+            "json": {"toUser": recipient, "amount": 1},
+            **auth_headers(context.tokens[sender]),
+        },
+    )
+
+
+def info_scenario(rng: random.Random, context: Context):
+    return "info", "GET", "/info", auth_headers(rng.choice(context.history_tokens))
+
+
+SCENARIOS = {
+    "login": login_scenario,
+    "buy": buy_scenario,
+    "gifts": gifts_scenario,
+    "info": info_scenario,
+}
+
+
+@asynccontextmanager
+async def connect(target: str | None, concurrency: int):
+    if not target:
+        async with app_client() as client:
+            yield client
+        return
+
+    async with AsyncClient(
+        base_url=f"{target.rstrip('/')}/api",
+        limits=Limits(max_connections=concurrency),
+        timeout=60,
+    ) as client:
+        yield client
+
+
+async def get_tokens(client: AsyncClient, usernames: list[str], concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(username: str) -> str:
+        async with semaphore:
+            return await get_token(client, username, PASSWORD)
+
+    return await asyncio.gather(*(login(username) for username in usernames))
+
+
+async def run(client: AsyncClient, scenario, context: Context, args) -> dict:
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    remaining = iter(range(args.requests))
+
+    async def worker(rng: random.Random):
+        for _ in remaining:
+            operation, method, url, options = scenario(rng, context)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **options)
+                status = str(response.status_code)
+            except HTTPError as e:
+                status = type(e).__name__
+            latencies[operation].append(time.perf_counter() - started)
+            statuses[operation][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker(random.Random(args.random_seed * 1000 + i))
+            for i in range(args.concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    def report(latencies: list[float], statuses: Counter) -> dict:
+        errors = sum(
+            count
+            for status, count in statuses.items()
+            if not status.isdigit() or int(status) >= 400
+        )
+        return {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "error_rate": round(errors / max(len(latencies), 1), 4),
+            "statuses": dict(statuses),
+            "latency": summarize(latencies),
+        }
+
+    return {
+        "duration_s": round(elapsed, 2),
+        **report(
+            [value for values in latencies.values() for value in values],
+            sum(statuses.values(), Counter()),
+        ),
+        "operations": {
+            operation: report(latencies[operation], statuses[operation])
+            for operation in sorted(latencies)
+        },
+    }
+
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenario", choices=SCENARIOS)
+    parser.add_argument("--target")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--history-users", type=int, default=20)
+    parser.add_argument("--history", type=int, default=5000)
+    parser.add_argument("--hot-recipients", type=int, default=3)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    usernames = await seed(
+        args.users, args.history_users, args.history, coins=1_000_000
+    )
+
+    async with connect(args.target, args.concurrency) as client:
+        tokens = []
+        if args.scenario != "login":
+            tokens = await get_tokens(client, usernames, args.concurrency)
+        context = Context(usernames, tokens, args)
+        result = await run(client, SCENARIOS[args.scenario], context, args)
+    await engine.dispose()
+
+    result = {
+        "scenario": args.scenario,
+        "revision": get_revision(),
+        "target": args.target or "in-process",
+        "concurrency": args.concurrency,
+        **result,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""Login throughput for returning users: legacy flow vs UserService.login.
+
+Usage: python -m benchmarks.login_throughput [--concurrency 16] [--logins 200]
+
+The legacy flow is the one /api/auth used before: get_or_create_user
+(bcrypt hash + upsert), commit, then authenticate_user (select + bcrypt
+verify). The new flow selects the user and verifies the password once.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.api.v1.auth.services.user_service import UserService
+from app.core.db.engine import async_session, engine
+from .common import random_username, summarize
+
+
+PASSWORD = "Secretpassword"
+
+
+async def legacy_login(username: str):
+    async with async_session() as session:
+        user_service = UserService(session)
+        await user_service.get_or_create_user(username=username, password=PASSWORD)
+        await session.commit()
+        assert await user_service.authenticate_user(username, PASSWORD)
+
+
+async def login(username: str):
+    async with async_session() as session:
+        assert await UserService(session).login(username, PASSWORD)
+        await session.commit()
+
+
+async def run(flow, usernames: list[str], logins: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(logins))
+
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            await flow(usernames[i % len(usernames)])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "flow": flow.__name__,
+        "logins_per_sec": round(logins / elapsed, 1),
+        "latency": summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=16)
+    args = parser.parse_args()
+
+    usernames = [random_username() for _ in range(args.users)]
+    for username in usernames:
+        await login(username)
+
+    results = [
+        await run(flow, usernames, args.logins, args.concurrency)
+        for flow in (legacy_login, login)
+    ]
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
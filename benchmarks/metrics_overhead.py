@@ -0,0 +1,95 @@
+"""Overhead of the Prometheus metrics.
+
+Usage: python -m benchmarks.metrics_overhead [--requests 2000] [--queries 2000]
+
+    request    GET /api/items through the router with and without
+               MetricsMiddleware (the catalog is cached, so the request itself
+               is cheap and the middleware cost shows)
+    statement  SELECT 1 round trips with and without the statement listeners
+    observe    one labelled histogram observation
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import timeit
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.core.db.engine import engine
+from app.core.metrics import (
+    REQUEST_DURATION,
+    MetricsMiddleware,
+    instrument_engine,
+    uninstrument_engine,
+)
+from app.main import app
+from .common import summarize
+
+
+async def measure_requests(asgi_app, requests: int) -> list[float]:
+    latencies = []
+    async with AsyncClient(
+        transport=ASGITransport(app=asgi_app), base_url="http://localhost/api"
+    ) as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/items")
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return latencies
+
+
+async def measure_statements(queries: int) -> dict:
+    latencies = []
+    async with engine.connect() as conn:
+        for _ in range(queries):
+            started = time.perf_counter()
+            await conn.execute(text("SELECT 1"))
+            latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        # app.router is the application without its middleware stack. The two
+        # variants alternate in rounds so that drift affects both alike.
+        instrumented = MetricsMiddleware(app.router)
+        await measure_requests(app.router, 100)
+        without, with_metrics = [], []
+        for _ in range(10):
+            without += await measure_requests(app.router, args.requests // 10)
+            with_metrics += await measure_requests(instrumented, args.requests // 10)
+        results["request"] = {
+            "without_metrics": summarize(without),
+            "with_metrics": summarize(with_metrics),
+        }
+
+        uninstrument_engine(engine)
+        without = await measure_statements(args.queries)
+        instrument_engine(engine)
+        results["statement"] = {
+            "without_metrics": without,
+            "with_metrics": await measure_statements(args.queries),
+        }
+    await engine.dispose()
+
+    number = 100_000
+    seconds = timeit.timeit(
+        lambda: REQUEST_DURATION.labels("GET", "/api/items").observe(0.001),
+        number=number,
+    )
+    results["observe_us"] = round(seconds / number * 1e6, 3)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
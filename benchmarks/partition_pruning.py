@@ -0,0 +1,134 @@
+"""History pages over a ledger partitioned by month, with and without bounds.
+
+Usage: python -m benchmarks.partition_pruning [--months 12] [--per-month 20000]
+                                              [--repeat 50]
+
+Seeds one user with gifts spread over the last N months and measures the
+sent-history page query unbounded, bounded to one month (since/until) and
+deep in history through a cursor. "partitions" is the number of partitions
+the executed plan actually scanned (the unbounded page also opens the empty
+partitions created ahead of time).
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+
+from app.api.v1.store.services.partition_service import (
+    PartitionService,
+    add_months,
+    month_start,
+)
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.db.engine import async_session, engine, read_only_async_session
+from .common import random_username, summarize
+
+
+async def seed(months: list[date], per_month: int) -> int:
+    async with async_session() as session:
+        partition_service = PartitionService(session)
+        existing = set(await partition_service.get_partitions())
+        for month in months:
+            if month not in existing:
+                await partition_service.create_partition(month)
+
+        user_id, peer_id = [
+            (
+                await session.execute(
+                    text(
+                        "INSERT INTO users (username, password, created_at, coins) "
+                        "VALUES (:username, '-', :now, 1000) RETURNING id"
+                    ),
+                    dict(username=random_username(), now=datetime.now()),
+                )
+            ).scalar()
+            for _ in range(2)
+        ]
+        for month in months:
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO transactions
+                        (user_id, amount, type, timestamp, recipient_id)
+                    SELECT :user_id, 1, 'GIFT',
+                        CAST(:start AS TIMESTAMP) + n * interval '1 second', :peer_id
+                    FROM generate_series(1, :per_month) AS n
+                    """
+                ),
+                dict(
+                    user_id=user_id,
+                    peer_id=peer_id,
+                    start=datetime.combine(month, datetime.min.time()),
+                    per_month=per_month,
+                ),
+            )
+        await session.commit()
+        await session.execute(text("ANALYZE transactions"))
+    return user_id
+
+
+async def measure(user_id: int, repeat: int, **bounds) -> dict:
+    async with read_only_async_session() as session:
+        transaction_service = TransactionService(session)
+        statement = transaction_service.sent_transactions_page_query(
+            user_id, 50, **bounds
+        )
+        compiled = statement.compile(
+            dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = "\n".join(
+            (
+                await session.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF) {compiled}"))
+            ).scalars()
+        )
+        scanned = {
+            match.group(1)
+            for line in plan.splitlines()
+            if "never executed" not in line
+            and (match := re.search(r" on (transactions_y\d{4}m\d{2})\b", line))
+        }
+
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await transaction_service.get_sent_transactions_page(user_id, 50, **bounds)
+            latencies.append(time.perf_counter() - started)
+
+    return {"partitions": len(scanned), "latency": summarize(latencies)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--per-month", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    current = month_start(date.today())
+    months = [add_months(current, -i) for i in range(args.months)]
+    user_id = await seed(months, args.per_month)
+
+    oldest = datetime.combine(months[-1], datetime.min.time())
+    results = {
+        "unbounded": await measure(user_id, args.repeat),
+        "one_month": await measure(
+            user_id,
+            args.repeat,
+            since=oldest,
+            until=oldest + timedelta(days=31),
+        ),
+        "cursor_in_oldest_month": await measure(
+            user_id, args.repeat, cursor=(oldest + timedelta(days=1), 2**31 - 1)
+        ),
+    }
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
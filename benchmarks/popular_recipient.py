@@ -0,0 +1,101 @@
+"""Many senders gifting one recipient: direct vs deferred crediting.
+
+Usage: python -m benchmarks.popular_recipient [--senders 500] [--gifts 4]
+                                              [--concurrency 100]
+
+In the direct mode every gift locks the recipient's row, in the deferred mode
+gifts only lock their sender and append a pending credit. After each run the
+credits are compacted and the balances checked for exactness.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from sqlalchemy import func, select
+
+from app.api.v1.auth.models import User
+from app.api.v1.store.services.credit_service import CreditService
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from app.core.db.engine import async_session, engine
+from .common import random_username, summarize
+
+
+async def create_users(count: int) -> list[User]:
+    async with async_session() as session:
+        users = [
+            User(
+                username=random_username(),
+                password="-",
+                created_at=datetime.now(),
+                coins=1000,
+            )
+            for _ in range(count)
+        ]
+        session.add_all(users)
+        await session.commit()
+    return users
+
+
+async def run(deferred: bool, args) -> dict:
+    senders = await create_users(args.senders)
+    (recipient,) = await create_users(1)
+    gifts = iter([sender for sender in senders for _ in range(args.gifts)])
+    latencies = []
+
+    async def worker():
+        for sender in gifts:
+            started = time.perf_counter()
+            async with async_session() as session:
+                result = await TransferService(session).transfer(
+                    sender.id, recipient.username, 1, deferred=deferred
+                )
+                await session.commit()
+            assert result == TransferResult.OK
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    async with async_session() as session:
+        started_compaction = time.perf_counter()
+        while await CreditService(session).compact(limit=10_000):
+            pass
+        await session.commit()
+        compaction = time.perf_counter() - started_compaction
+
+        ids = [user.id for user in senders] + [recipient.id]
+        total = await session.scalar(
+            select(func.sum(User.coins)).where(User.id.in_(ids))
+        )
+        received = await session.scalar(
+            select(User.coins).where(User.id == recipient.id)
+        )
+
+    gifts_count = args.senders * args.gifts
+    return {
+        "mode": "deferred" if deferred else "direct",
+        "gifts_per_sec": round(gifts_count / elapsed, 1),
+        "latency": summarize(latencies),
+        "compaction_ms": round(compaction * 1000, 2),
+        "exact": total == len(ids) * 1000 and received == 1000 + gifts_count,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--senders", type=int, default=500)
+    parser.add_argument("--gifts", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    results = [await run(deferred, args) for deferred in (False, True)]
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""Concurrent purchases by a single user: legacy ORM flow vs PurchaseService.
+
+Usage: python -m benchmarks.purchase_concurrency [--concurrency 16] [--buys 500]
+
+The legacy flow is what /api/buy did before, kept here for comparison: lock
+the user with SELECT ... FOR UPDATE, select the item, upsert the inventory and
+the inventory item, update the balance and insert the transaction, keeping the
+row locked for all of those round trips.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.v1.auth.models import User
+from app.api.v1.auth.services.user_service import UserService
+from app.api.v1.store.models import Inventory, InventoryItem, Item, TransactionType
+from app.api.v1.store.services.purchase_service import PurchaseResult, PurchaseService
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.core.db.engine import async_session, engine
+from app.core.db.populate import populate_db
+from .common import random_username, summarize
+
+
+ITEM = "pen"
+
+
+async def legacy_purchase(user_id: int):
+    async with async_session() as session:
+        user = await UserService(session).get_user_by_id(user_id, for_update=True)
+        item = await session.scalar(select(Item).filter_by(type=ITEM))
+
+        await session.execute(
+            insert(Inventory)
+            .values(user_id=user.id)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        inventory = await session.scalar(select(Inventory).filter_by(user_id=user.id))
+        await session.execute(
+            insert(InventoryItem)
+            .values(inventory_id=inventory.id, item_id=item.id, quantity=1)
+            .on_conflict_do_update(
+                constraint="uq_inventory_item",
+                set_=dict(quantity=InventoryItem.quantity + 1),
+            )
+        )
+        await session.flush()
+
+        user.coins -= item.cost
+        await TransactionService(session).create_transaction(
+            user_id=user.id,
+            amount=item.cost,
+            type=TransactionType.PURCHASE,
+            item_id=item.id,
+        )
+        await session.commit()
+
+
+async def purchase(user_id: int, item_id: int):
+    async with async_session() as session:
+        result = await PurchaseService(session).purchase(user_id, item_id)
+        assert result == PurchaseResult.OK
+        await session.commit()
+
+
+async def run(name: str, buy, buys: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(buys))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await buy()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "flow": name,
+        "buys_per_sec": round(buys / elapsed, 1),
+        "latency": summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--buys", type=int, default=500)
+    args = parser.parse_args()
+
+    await populate_db()
+    async with async_session() as session:
+        user = User(
+            username=random_username(),
+            password="-",
+            created_at=datetime.now(),
+            coins=10**9,
+        )
+        session.add(user)
+        item = await session.scalar(select(Item).filter_by(type=ITEM))
+        await session.commit()
+
+    results = [
+        await run(
+            "legacy", lambda: legacy_purchase(user.id), args.buys, args.concurrency
+        ),
+        await run(
+            "single_statement",
+            lambda: purchase(user.id, item.id),
+            args.buys,
+            args.concurrency,
+        ),
+    ]
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""Seeds users and coin history for the load tests.
+
+Usage: python -m benchmarks.seeder [--users 1000] [--history-users 20]
+                                   [--history 5000] [--coins 1000000]
+
+Creates the users {prefix}_000000, {prefix}_000001, ... with the password
+PASSWORD. The first --history-users of them get --history sent and as many
+received gifts. Seeding again resets balances, inventories and pending
+credits and only tops the history up, so every run starts from the same
+state.
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app.api.v1.auth.security import get_password_hash
+from app.api.v1.store.services.partition_service import PartitionService
+from app.core.db.engine import async_session, engine
+
+
+PASSWORD = "Loadtestpassword"
+
+UPSERT_USERS_STATEMENT = text(
+    """
+    INSERT INTO users (username, password, created_at, coins)
+    SELECT :prefix || '_' || lpad(CAST(n AS TEXT), 6, '0'), :password, :now, :coins
+    FROM generate_series(0, :users - 1) AS n
+    ON CONFLICT (username) DO UPDATE SET coins = EXCLUDED.coins
+    RETURNING id, username
+    """
+)
+
+RESET_USERS_STATEMENT = text(
+    """
+    WITH credits AS (
+        DELETE FROM pending_credits WHERE user_id = ANY(:user_ids)
+    )
+    DELETE FROM inventories WHERE user_id = ANY(:user_ids)
+    """
+)
+
+# Gifts between the user and the seeded peers going round robin, one second
+# apart back from now, only as many as are missing.
+TOP_UP_HISTORY_STATEMENT = """
+    INSERT INTO transactions (user_id, recipient_id, amount, type, timestamp)
+    SELECT
+        {sender}, {recipient}, 1, 'GIFT',
+        CAST(:now AS TIMESTAMP) - n * interval '1 second'
+    FROM generate_series(
+        (
+            SELECT count(*) FROM transactions
+            WHERE {column} = :user_id AND type = 'GIFT'
+        ) + 1,
+        :history
+    ) AS n,
+    (SELECT CAST(:peer_ids AS INTEGER[]) AS ids) AS peers
+"""
+
+TOP_UP_SENT_STATEMENT = text(
+    TOP_UP_HISTORY_STATEMENT.format(
+        sender=":user_id",
+        recipient="peers.ids[1 + n % cardinality(peers.ids)]",
+        column="user_id",
+    )
+)
+
+TOP_UP_RECEIVED_STATEMENT = text(
+    TOP_UP_HISTORY_STATEMENT.format(
+        sender="peers.ids[1 + n % cardinality(peers.ids)]",
+        recipient=":user_id",
+        column="recipient_id",
+    )
+)
+
+
+async def seed(
+    users: int,
+    history_users: int,
+    history: int,
+    coins: int,
+    prefix: str = "load",
+) -> list[str]:
+    """Seeds the users and returns their usernames in order."""
+    now = datetime.now()
+    async with async_session() as session:
+        await PartitionService(session).ensure_partitions(
+            (now - timedelta(seconds=history)).date(), now.date()
+        )
+
+        result = await session.execute(
+            UPSERT_USERS_STATEMENT,
+            dict(
+                prefix=prefix,
+                password=get_password_hash(PASSWORD),
+                now=now,
+                coins=coins,
+                users=users,
+            ),
+        )
+        seeded = sorted(result.all(), key=lambda row: row.username)
+        user_ids = [row.id for row in seeded]
+        await session.execute(RESET_USERS_STATEMENT, dict(user_ids=user_ids))
+
+        for i, user_id in enumerate(user_ids[:history_users]):
+            parameters = dict(
+                user_id=user_id,
+                peer_ids=user_ids[:i] + user_ids[i + 1 :],
+                history=history,
+                now=now,
+            )
+            await session.execute(TOP_UP_SENT_STATEMENT, parameters)
+            await session.execute(TOP_UP_RECEIVED_STATEMENT, parameters)
+
+        await session.commit()
+        await session.execute(text("ANALYZE transactions"))
+
+    return [row.username for row in seeded]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--history-users", type=int, default=20)
+    parser.add_argument("--history", type=int, default=5000)
+    parser.add_argument("--coins", type=int, default=1_000_000)
+    parser.add_argument("--prefix", default="load")
+    args = parser.parse_args()
+
+    usernames = await seed(
+        args.users, args.history_users, args.history, args.coins, args.prefix
+    )
+    await engine.dispose()
+
+    print(json.dumps({"users": len(usernames), "first": usernames[0]}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
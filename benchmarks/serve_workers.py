@@ -0,0 +1,105 @@
+"""Throughput of `python -m app.serve` with 1 worker vs N workers over HTTP.
+
+Usage: python -m benchmarks.serve_workers [--workers 1 4] [--duration 10]
+                                          [--concurrency 64] [--port 8090]
+
+Every run starts the launcher as a subprocess against the database from
+settings (already migrated) and drives GET /api/info and GET /api/items with
+a fixed number of concurrent clients.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+
+from .common import random_username, summarize
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/items")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def run_load(client: httpx.AsyncClient, token: str, args) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + args.duration
+
+    async def worker(index: int):
+        nonlocal errors
+        path = "/info" if index % 2 == 0 else "/items"
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "latency": summarize(latencies),
+    }
+
+
+async def measure(workers: int, args) -> dict:
+    env = dict(os.environ, SERVER_WORKERS=str(workers), SERVER_PORT=str(args.port))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.serve"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}/api", limits=limits, timeout=30
+        ) as client:
+            await wait_until_ready(client)
+            response = await client.post(
+                "/auth", json={"username": random_username(), "password": "password"}
+            )
+            response.raise_for_status()
+            result = await run_load(client, response.json()["token"], args)
+    finally:
+        process.send_signal(signal.SIGINT)
+        process.wait(timeout=30)
+
+    return {"workers": workers, **result}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1]
+    )
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+
+    results = [await measure(workers, args) for workers in dict.fromkeys(args.workers)]
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
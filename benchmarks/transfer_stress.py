@@ -0,0 +1,114 @@
+"""Mutual gifting stress test: legacy locking flow vs TransferService.
+
+Usage: python -m benchmarks.transfer_stress [--users 4] [--transfers 400]
+
+Users gift each other in random directions. The legacy flow is what
+/api/sendCoin did before: lock the sender, then lock the recipient by
+username, update both balances and insert the transaction. Because the two
+locks are taken in request order, opposite transfers deadlock.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from sqlalchemy.exc import DBAPIError
+
+from app.api.v1.auth.models import User
+from app.api.v1.auth.services.user_service import UserService
+from app.api.v1.store.models import TransactionType
+from app.api.v1.store.services.transaction_service import TransactionService
+from app.api.v1.store.services.transfer_service import TransferResult, TransferService
+from app.core.db.engine import async_session, engine
+from .common import random_username, summarize
+
+
+async def legacy_transfer(sender: User, recipient: User):
+    async with async_session() as session:
+        user_service = UserService(session)
+        sender = await user_service.get_user_by_id(sender.id, for_update=True)
+        recipient = await user_service.get_user_by_username(
+            recipient.username, for_update=True
+        )
+        sender.coins -= 1
+        recipient.coins += 1
+        await TransactionService(session).create_transaction(
+            user_id=sender.id,
+            amount=1,
+            type=TransactionType.GIFT,
+            recipient_id=recipient.id,
+        )
+        await session.commit()
+
+
+async def transfer(sender: User, recipient: User):
+    async with async_session() as session:
+        result = await TransferService(session).transfer(
+            sender.id, recipient.username, 1
+        )
+        assert result == TransferResult.OK
+        await session.commit()
+
+
+async def run(flow, users: list[User], transfers: int, concurrency: int) -> dict:
+    latencies, deadlocks = [], 0
+    remaining = iter(range(transfers))
+
+    async def worker():
+        nonlocal deadlocks
+        for _ in remaining:
+            sender, recipient = random.sample(users, 2)
+            started = time.perf_counter()
+            try:
+                await flow(sender, recipient)
+            except DBAPIError as e:
+                if "deadlock" not in str(e):
+                    raise
+                deadlocks += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "flow": flow.__name__,
+        "transfers_per_sec": round((transfers - deadlocks) / elapsed, 1),
+        "deadlocks": deadlocks,
+        "latency": summarize(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--transfers", type=int, default=400)
+    args = parser.parse_args()
+
+    async with async_session() as session:
+        users = [
+            User(
+                username=random_username(),
+                password="-",
+                created_at=datetime.now(),
+                coins=10**6,
+            )
+            for _ in range(args.users)
+        ]
+        session.add_all(users)
+        await session.commit()
+
+    results = [
+        await run(flow, users, args.transfers, args.concurrency)
+        for flow in (legacy_transfer, transfer)
+    ]
+    await engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())